@@ -0,0 +1,106 @@
+"""
+Concurrent adds of the same items to one cart through the API: threads with
+their own database connections post to /api/v1/carts/items/ at once. Fails
+when a request errors (e.g. "database is locked"), a cart has duplicate cart
+items, or the quantities or the stored totals lost an update.
+
+    python -m benchmarks.bench_cart_concurrency [--threads 8] [--adds 50] [--items 3]
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import setup_django
+
+
+def populate(item_count):
+    from carts.models import Cart
+    from items.models import Item
+    from users.models import User
+
+    user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+    Cart.objects.get_or_create(user=user)
+    items = Item.objects.bulk_create(
+        Item(title=f'Item {number}', description='Synthetic item', image='items/foodb1.jpg', weight=1000, price=150)
+        for number in range(item_count)
+    )
+    return user, [item.pk for item in Item.objects.filter(title__in=[item.title for item in items])]
+
+
+def add_items(token, item_ids, adds, barrier, statuses):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    barrier.wait()
+    try:
+        for number in range(adds):
+            response = client.post(
+                '/api/v1/carts/items/',
+                {'item_id': item_ids[number % len(item_ids)], 'quantity': 1},
+                format='json',
+            )
+            statuses[response.status_code] += 1
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8, help='Number of concurrent clients')
+    parser.add_argument('--adds', type=int, default=50, help='Adds of every client')
+    parser.add_argument('--items', type=int, default=3, help='Number of the added items')
+    parser.add_argument('--database', help='SQLite file of the benchmark, a temporary file by default')
+    args = parser.parse_args()
+
+    database_path = setup_django(args.database)
+    print(f'Populating {database_path} with {args.items} items')
+
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+    from carts.models import Cart
+
+    user, item_ids = populate(args.items)
+    token = Token.objects.create(user=user).key
+    connection.close()
+
+    barrier = threading.Barrier(args.threads)
+    statuses = Counter()
+    threads = [
+        threading.Thread(target=add_items, args=(token, item_ids, args.adds, barrier, statuses))
+        for _ in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    cart = Cart.objects.get(user=user)
+    lines = list(cart.cart_items.values_list('item', 'quantity'))
+    adds = Counter(item_ids[number % len(item_ids)] for number in range(args.adds))
+    expected = {item_id: count * args.threads for item_id, count in adds.items()}
+    computed = Cart.objects.with_computed_totals().get(pk=cart.pk)
+    requests = args.threads * args.adds
+    print(f'Requests: {requests}, {requests / elapsed:.1f} requests/sec, statuses: {dict(statuses)}')
+    print(f'Cart items: {len(lines)}, quantities: {dict(lines)}, expected: {expected}')
+    print(f'Stored totals: {cart.total_cost}/{cart.items_count}, '
+          f'computed: {computed.computed_total_cost}/{computed.computed_items_count}')
+    failed = (
+        statuses[201] != requests
+        or dict(lines) != expected
+        or len(lines) != len(expected)
+        or (cart.total_cost, cart.items_count) != (computed.computed_total_cost, computed.computed_items_count)
+    )
+    if failed:
+        print('FAILED: lost updates, duplicate cart items or failed requests')
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
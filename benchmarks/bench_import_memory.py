@@ -0,0 +1,101 @@
+"""
+Peak memory (tracemalloc) of reading import sources of growing size: the whole
+payload parsed by json.loads against the streaming reader of the import
+commands consumed by batches.
+
+    python -m benchmarks.bench_import_memory [--records 10000 100000 1000000]
+"""
+import argparse
+import gzip
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import print_table
+
+BATCH_SIZE = 1000
+
+
+def make_review(number):
+    return {
+        'id': number,
+        'author': number % 1000 + 1,
+        'content': f'Review number {number} of a synthetic import source. ' * 3,
+        'created_at': '2020-09-08',
+        'published_at': '2020-09-10',
+        'status': 'published',
+    }
+
+
+def write_sources(directory, count):
+    """Write the records as a JSON array, JSONL and gzip-compressed JSON array and return the paths."""
+    paths = {
+        'json': directory / f'reviews-{count}.json',
+        'jsonl': directory / f'reviews-{count}.jsonl',
+        'json.gz': directory / f'reviews-{count}.json.gz',
+    }
+    with open(paths['json'], 'w') as json_file, open(paths['jsonl'], 'w') as jsonl_file, \
+            gzip.open(paths['json.gz'], 'wt') as gzip_file:
+        for file in (json_file, gzip_file):
+            file.write('[\n')
+        for number in range(1, count + 1):
+            line = json.dumps(make_review(number))
+            separator = ',\n' if number < count else '\n'
+            json_file.write(line + separator)
+            gzip_file.write(line + separator)
+            jsonl_file.write(line + '\n')
+        for file in (json_file, gzip_file):
+            file.write(']\n')
+    return paths
+
+
+def load_whole(path):
+    with open(path) as file:
+        return len(json.loads(file.read()))
+
+
+def read_streaming(path):
+    from stepik_packages.importing.sources import batched, read_records
+
+    return sum(len(batch) for batch in batched(read_records(str(path)), BATCH_SIZE))
+
+
+def measure_peak(func, path):
+    """Return the number of records, the peak of traced memory in MiB and the duration in seconds."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak / 2 ** 20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Sizes of the synthetic sources')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='bench-') as directory:
+        for count in args.records:
+            paths = write_sources(Path(directory), count)
+            size = paths['json'].stat().st_size / 2 ** 20
+            cases = [
+                ('json.loads', 'json', load_whole),
+                ('stream', 'json', read_streaming),
+                ('stream', 'jsonl', read_streaming),
+                ('stream', 'json.gz', read_streaming),
+            ]
+            for reader, source_format, func in cases:
+                records, peak, elapsed = measure_peak(func, paths[source_format])
+                assert records == count
+                rows.append((count, f'{size:.1f}', reader, source_format, f'{peak:.1f}', f'{count / elapsed:.0f}'))
+    print_table(('records', 'json MiB', 'reader', 'format', 'peak MiB', 'records/sec'), rows)
+
+
+if __name__ == '__main__':
+    main()
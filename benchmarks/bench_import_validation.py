@@ -0,0 +1,100 @@
+"""
+Records/sec of the schema validation of the import commands: per-row
+jsonschema.validate against a validator compiled once and against the
+RecordValidator (fast-path checker, jsonschema only for the rejected records).
+
+    python -m benchmarks.bench_import_validation [--records 20000] [--invalid 0.05]
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def make_records(command, count, invalid_share):
+    from items.management.commands.import_items import Command as ImportItems
+    from reviews.management.commands.import_reviews import Command as ImportReviews
+    from users.management.commands.import_users import Command as ImportUsers
+
+    def item(number):
+        return {
+            'id': number, 'title': f'Item {number}', 'description': 'Synthetic item',
+            'image': 'https://example.com/foodb1.jpg', 'weight_grams': 1000, 'price': 1500,
+        }
+
+    def user(number):
+        return {
+            'id': number, 'email': f'user{number}@example.com', 'password': 'secret123',
+            'info': {'surname': 'Иванов', 'name': 'Иван', 'patronymic': 'Иванович'},
+            'contacts': {'phoneNumber': '8-999-777-66-00'}, 'city_kladr': 'Санкт-Петербург',
+        }
+
+    def review(number):
+        return {
+            'id': number, 'author': number % 100 + 1, 'content': 'Synthetic review',
+            'created_at': '2020-09-08', 'published_at': '', 'status': 'new',
+        }
+
+    schema, make, broken_field = {
+        'items': (ImportItems.json_item_schema, item, 'weight_grams'),
+        'users': (ImportUsers.json_user_schema, user, 'info'),
+        'reviews': (ImportReviews.json_review_schema, review, 'author'),
+    }[command]
+    records = [make(number) for number in range(count)]
+    for record in random.sample(records, int(count * invalid_share)):
+        record[broken_field] = 'broken'
+    return schema, records
+
+
+def validate_per_row(schema, records):
+    import jsonschema
+
+    valid = 0
+    for record in records:
+        try:
+            jsonschema.validate(record, schema=schema)
+            valid += 1
+        except jsonschema.exceptions.ValidationError:
+            pass
+    return valid
+
+
+def validate_compiled(schema, records):
+    from jsonschema.validators import validator_for
+
+    validator = validator_for(schema)(schema)
+    return sum(1 for record in records if validator.is_valid(record))
+
+
+def validate_record_validator(schema, records):
+    from stepik_packages.importing.validation import RecordValidator
+
+    valid, _ = RecordValidator(schema).split(records)
+    return len(valid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000, help='Number of synthetic records of every command')
+    parser.add_argument('--invalid', type=float, default=0.05, help='Share of invalid records')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of every validation, the median is reported')
+    args = parser.parse_args()
+
+    setup_django()
+    random.seed(1)
+    rows = []
+    for command in ('items', 'users', 'reviews'):
+        schema, records = make_records(command, args.records, args.invalid)
+        for name, validate in [
+            ('jsonschema.validate per row', validate_per_row),
+            ('compiled validator', validate_compiled),
+            ('RecordValidator', validate_record_validator),
+        ]:
+            valid = validate(schema, records)
+            elapsed = measure(lambda: validate(schema, records), args.repeat) / 1000
+            rows.append((command, name, valid, f'{len(records) / elapsed:.0f}'))
+    print_table(('command', 'validation', 'valid', 'records/sec'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+EXPLAIN QUERY PLAN and latency of the catalog filters (ItemFilter plus
+ordering) with and without the price/weight indexes of items.Item.
+
+    python -m benchmarks.bench_item_filters [--items 1000000] [--repeat 5]
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, print_table, setup_django
+
+CASES = [
+    ('price range', {'price__gte': '1000', 'price__lte': '1500'}, ['id']),
+    ('price range by price', {'price__gte': '1000', 'price__lte': '1500'}, ['price', 'id']),
+    ('price from by -price', {'price__gt': '4000'}, ['-price', '-id']),
+    ('weight range by price', {'weight__gte': '5000', 'weight__lt': '5100'}, ['price', 'id']),
+    ('weight and price ranges', {'weight__gte': '5000', 'weight__lte': '6000', 'price__lt': '500'}, ['price', 'id']),
+    ('all by price', {}, ['price', 'id']),
+]
+INDEXES = ['items_item_price_id_idx', 'items_item_weight_price_idx']
+PAGE_SIZE = 6
+BATCH_SIZE = 50000
+
+
+def populate(count):
+    from django.db import connection, transaction
+
+    rows = (
+        (f'Item {number}', 'Synthetic item', 'items/foodb1.jpg', random.randint(100, 10000),
+         round(random.uniform(100, 5000), 2))
+        for number in range(count)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(
+                    'INSERT INTO items_item (title, description, image, weight, price) VALUES (%s, %s, %s, %s, %s)',
+                    batch,
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                'INSERT INTO items_item (title, description, image, weight, price) VALUES (%s, %s, %s, %s, %s)',
+                batch,
+            )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def run_cases(repeat):
+    from items.filters import ItemFilter
+    from items.models import Item
+    from stepik_packages.paginations import KeysetPagination
+
+    rows = []
+    for name, params, ordering in CASES:
+        queryset = ItemFilter(params, queryset=Item.objects.all()).qs.order_by(*ordering)
+        count = queryset.count()
+        offset = count // 2
+        position_row = queryset.values(*[order.lstrip('-') for order in ordering])[offset:offset + 1]
+        position = [str(value) for value in position_row[0].values()] if count else None
+        keyset_page = queryset
+        if position is not None:
+            keyset_page = queryset.filter(KeysetPagination().get_position_filter(ordering, position))
+        rows.append((
+            name,
+            count,
+            f'{measure(queryset.count, repeat):.2f}',
+            f'{measure(lambda: list(queryset[:PAGE_SIZE]), repeat):.2f}',
+            f'{measure(lambda: list(queryset[offset:offset + PAGE_SIZE]), repeat):.2f}',
+            f'{measure(lambda: list(keyset_page[:PAGE_SIZE]), repeat):.2f}',
+        ))
+        print(f'-- {name}: {params} ordered by {ordering}')
+        print(queryset[:PAGE_SIZE].explain())
+        print()
+    print_table(('case', 'rows', 'count ms', 'first page ms', 'middle page offset ms', 'middle page keyset ms'), rows)
+    print()
+
+
+def drop_indexes():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        for index in INDEXES:
+            cursor.execute(f'DROP INDEX {index}')
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=1000000, help='Number of synthetic items')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of every query, the median is reported')
+    parser.add_argument('--database', help='SQLite file of the benchmark, a temporary file by default')
+    args = parser.parse_args()
+
+    database_path = setup_django(args.database)
+    print(f'Populating {database_path} with {args.items} items')
+    random.seed(1)
+    populate(args.items)
+
+    print('=== With indexes')
+    run_cases(args.repeat)
+    drop_indexes()
+    print('=== Without indexes')
+    run_cases(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Latency of the item search by the FTS5 index against a LIKE scan over the
+title and description.
+
+    python -m benchmarks.bench_item_search [--items 200000] [--repeat 5]
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, print_table, setup_django
+
+PAGE_SIZE = 6
+BATCH_SIZE = 20000
+VOCABULARY_SIZE = 5000
+WORDS_PER_DESCRIPTION = 60
+TERMS = ['word17', 'word420 word421', 'word4999', 'wor']
+
+
+def populate(count):
+    from django.db import connection, transaction
+
+    vocabulary = [f'word{number}' for number in range(VOCABULARY_SIZE)]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    sql = 'INSERT INTO items_item (title, description, image, weight, price) VALUES (%s, %s, %s, %s, %s)'
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, count, BATCH_SIZE):
+            cursor.executemany(sql, [
+                (
+                    ' '.join(random.choices(vocabulary, weights, k=3)),
+                    ' '.join(random.choices(vocabulary, weights, k=WORDS_PER_DESCRIPTION)),
+                    'items/foodb1.jpg',
+                    random.randint(100, 10000),
+                    round(random.uniform(100, 5000), 2),
+                )
+                for _ in range(min(BATCH_SIZE, count - start))
+            ])
+
+
+def like_search(queryset, term):
+    from django.db.models import Q
+
+    for token in term.split():
+        queryset = queryset.filter(Q(title__icontains=token) | Q(description__icontains=token))
+    return queryset.order_by('id')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200000, help='Number of synthetic items')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of every query, the median is reported')
+    parser.add_argument('--database', help='SQLite file of the benchmark, a temporary file by default')
+    args = parser.parse_args()
+
+    database_path = setup_django(args.database)
+    print(f'Populating {database_path} with {args.items} items')
+    random.seed(1)
+    populate(args.items)
+
+    from django.db import connection
+    from items.models import Item
+    from items.search import search_items, SEARCH_RANK
+
+    rows = []
+    for term in TERMS:
+        fts = search_items(Item.objects.all(), term, connection).order_by(SEARCH_RANK, 'id')
+        like = like_search(Item.objects.all(), term)
+        rows.append((
+            term,
+            fts.count(),
+            like.count(),
+            f'{measure(fts.count, args.repeat):.2f}',
+            f'{measure(lambda: list(fts[:PAGE_SIZE]), args.repeat):.2f}',
+            f'{measure(like.count, args.repeat):.2f}',
+            f'{measure(lambda: list(like[:PAGE_SIZE]), args.repeat):.2f}',
+        ))
+    print_table(
+        ('term', 'fts rows', 'like rows', 'fts count ms', 'fts page ms', 'like count ms', 'like page ms'),
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Latency of the pages of the published reviews feed at growing depth: the
+keyset (cursor) page of ReviewViewSet over the (status, published_at, id)
+index against an OFFSET page of the same queryset.
+
+    python -m benchmarks.bench_reviews_feed [--reviews 10000000] [--repeat 5]
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, print_table, setup_django
+
+AUTHORS = 1000
+BATCH_SIZE = 50000
+DEPTHS = [0, 0.001, 0.1, 0.5, 0.999]
+ORDERING = ['-published_at', '-id']
+STATUSES = ['published'] * 8 + ['new', 'hidden']
+PERIOD = 5 * 365 * 24 * 3600
+
+
+def populate(count):
+    from datetime import datetime, timedelta, timezone
+
+    from django.db import connection, transaction
+
+    start = datetime(2018, 1, 1, tzinfo=timezone.utc)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO users_user (password, is_superuser, username, first_name, last_name, email, is_staff, '
+            'is_active, date_joined, middle_name, phone, address) '
+            'VALUES (\'\', 0, %s, %s, %s, \'\', 0, 1, %s, \'\', \'\', \'\')',
+            [(f'author{number}', f'Name{number}', f'Surname{number}', start) for number in range(AUTHORS)],
+        )
+        cursor.execute('SELECT min(id) FROM users_user')
+        first_author = cursor.fetchone()[0]
+        sql = (
+            'INSERT INTO reviews_review (author_id, text, created_at, published_at, status) '
+            'VALUES (%s, %s, %s, %s, %s)'
+        )
+        for batch_start in range(0, count, BATCH_SIZE):
+            rows = []
+            for _ in range(min(BATCH_SIZE, count - batch_start)):
+                created_at = start + timedelta(seconds=random.randrange(PERIOD))
+                status = random.choice(STATUSES)
+                published_at = created_at + timedelta(days=1) if status == 'published' else None
+                rows.append((first_author + random.randrange(AUTHORS), 'Synthetic review', created_at,
+                             published_at, status))
+            cursor.executemany(sql, rows)
+        cursor.execute('ANALYZE')
+
+
+def feed_queryset():
+    from reviews.views import ReviewViewSet
+
+    return ReviewViewSet.queryset.order_by(*ORDERING)
+
+
+def keyset_page(position):
+    from reviews.paginations import ReviewCursorPagination
+
+    queryset = feed_queryset()
+    if position is not None:
+        queryset = queryset.filter(ReviewCursorPagination().get_position_filter(ORDERING, position))
+    return queryset[:ReviewCursorPagination.page_size + 1]
+
+
+def offset_page(offset):
+    from reviews.paginations import ReviewCursorPagination
+
+    return feed_queryset()[offset:offset + ReviewCursorPagination.page_size + 1]
+
+
+def serialize(page):
+    from reviews.serializers import ReviewSerializer
+
+    # A fresh clone of the page on every run, the results of a queryset are cached
+    return lambda: ReviewSerializer(page.all(), many=True).data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reviews', type=int, default=1000000, help='Number of synthetic reviews')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of every query, the median is reported')
+    parser.add_argument('--database', help='SQLite file of the benchmark, a temporary file by default')
+    args = parser.parse_args()
+
+    database_path = setup_django(args.database)
+    print(f'Populating {database_path} with {args.reviews} reviews')
+    random.seed(1)
+    populate(args.reviews)
+
+    published = feed_queryset().count()
+    rows = []
+    for depth in DEPTHS:
+        offset = int(published * depth)
+        position = None
+        if offset:
+            row = feed_queryset().values('published_at', 'id')[offset - 1:offset][0]
+            position = [str(row['published_at']), str(row['id'])]
+        rows.append((
+            offset,
+            f'{measure(serialize(keyset_page(position)), args.repeat):.2f}',
+            f'{measure(serialize(offset_page(offset)), args.repeat):.2f}',
+        ))
+    print(keyset_page(position).explain())
+    print()
+    print(f'Published reviews: {published}')
+    print_table(('page offset', 'keyset page ms', 'offset page ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Throughput of mixed cart reads and writes from several worker processes with
+the default SQLite setup (rollback journal, a connection per request) against
+the tuned one (WAL, SQLITE_PRAGMAS and persistent connections). Every worker
+serves the requests of its own user like a WSGI worker: the connections are
+closed or kept by close_old_connections() around every request.
+
+    python -m benchmarks.bench_sqlite_concurrency [--workers 4] [--seconds 10] [--writes 0.2]
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.common import print_table, setup_django
+
+ITEMS = 100
+DEFAULT_SETUP = {'SQLITE_PRAGMAS': {}}
+
+
+def populate(workers):
+    from rest_framework.authtoken.models import Token
+
+    from carts.models import Cart
+    from items.models import Item
+    from users.models import User
+
+    Item.objects.bulk_create(
+        Item(title=f'Item {number}', description='Synthetic item', image='items/foodb1.jpg', weight=1000, price=150)
+        for number in range(ITEMS)
+    )
+    tokens = []
+    for number in range(workers):
+        user = User.objects.create_user(username=f'worker{number}', email=f'worker{number}@example.com')
+        Cart.objects.get_or_create(user=user)
+        tokens.append(Token.objects.create(user=user).key)
+    return tokens, list(Item.objects.values_list('pk', flat=True))
+
+
+def serve(database_path, tuned, token, item_ids, seconds, write_share, results):
+    setup_django(database_path, migrate=False, overrides=None if tuned else DEFAULT_SETUP)
+
+    from django.conf import settings
+    from django.db import close_old_connections, OperationalError
+    from rest_framework.test import APIClient
+
+    if not tuned:
+        settings.DATABASES['default']['CONN_MAX_AGE'] = 0
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    reads = writes = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        write = random.random() < write_share
+        started = time.perf_counter()
+        close_old_connections()
+        try:
+            if write:
+                response = client.post(
+                    '/api/v1/carts/items/', {'item_id': random.choice(item_ids), 'quantity': 1}, format='json',
+                )
+            else:
+                response = client.get('/api/v1/carts/')
+            failed = response.status_code >= 400
+        except OperationalError:
+            failed = True
+        finally:
+            close_old_connections()
+        latencies.append((time.perf_counter() - started) * 1000)
+        if failed:
+            errors += 1
+        elif write:
+            writes += 1
+        else:
+            reads += 1
+    results.put((reads, writes, errors, latencies))
+
+
+def run(database_path, tuned, tokens, item_ids, seconds, write_share):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=serve, args=(database_path, tuned, token, item_ids, seconds, write_share, results))
+        for token in tokens
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    reads, writes, errors = (sum(total[index] for total in totals) for index in range(3))
+    latencies = sorted(latency for total in totals for latency in total[3])
+    return (
+        'tuned' if tuned else 'default',
+        f'{(reads + writes) / seconds:.0f}',
+        f'{reads / seconds:.0f}',
+        f'{writes / seconds:.0f}',
+        errors,
+        f'{statistics.median(latencies):.2f}',
+        f'{latencies[int(len(latencies) * 0.99)]:.2f}',
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Number of worker processes')
+    parser.add_argument('--seconds', type=int, default=10, help='Duration of every run')
+    parser.add_argument('--writes', type=float, default=0.2, help='Share of the cart writes among the requests')
+    parser.add_argument('--database', help='SQLite file of the benchmark, a temporary file by default')
+    args = parser.parse_args()
+
+    # The template database keeps the default journal, every run gets its own copy
+    database_path = Path(setup_django(args.database, overrides=DEFAULT_SETUP))
+    print(f'Populating {database_path} with {ITEMS} items and {args.workers} users')
+    tokens, item_ids = populate(args.workers)
+
+    from django.db import connection
+    connection.close()
+
+    rows = []
+    for tuned in (False, True):
+        run_path = database_path.with_name(f'{"tuned" if tuned else "default"}-{database_path.name}')
+        shutil.copyfile(database_path, run_path)
+        if tuned:
+            # Like set_journal_mode on the deployed database, the journal mode is stored in the file
+            target = sqlite3.connect(run_path)
+            target.execute('PRAGMA journal_mode = wal')
+            target.close()
+        rows.append(run(run_path, tuned, tokens, item_ids, args.seconds, args.writes))
+    print_table(('setup', 'requests/sec', 'reads/sec', 'writes/sec', 'errors', 'median ms', 'p99 ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Helpers of the benchmarks. Every benchmark runs against its own SQLite
+database file, so the project database is never touched:
+
+    python -m benchmarks.bench_item_filters --items 1000000
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database_path=None, migrate=True, overrides=None):
+    """
+    Configure Django with the project settings, changed by `overrides`, and a
+    separate database (a temporary file by default), migrate it unless
+    `migrate` is false and return its path.
+    """
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stepik_packages.settings')
+
+    import django
+    from django.conf import settings
+
+    if database_path is None:
+        database_path = Path(tempfile.mkdtemp(prefix='bench-')) / 'bench.sqlite3'
+    settings.DATABASES['default']['NAME'] = database_path
+    settings.ALLOWED_HOSTS = ['*']
+    for name, value in (overrides or {}).items():
+        setattr(settings, name, value)
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+    return database_path
+
+
+def measure(func, repeat=5):
+    """Run `func` `repeat` times and return the median duration in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def print_table(header, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+    for row in (header, *rows):
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
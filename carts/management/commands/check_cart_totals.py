@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from carts.models import Cart
+
+
+class Command(BaseCommand):
+    help = 'Check stored cart totals against cart items and rebuild them'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rebuild the totals of inconsistent carts')
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild the totals of all carts without checking')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            print(f'Rebuilt totals of {Cart.objects.rebuild_totals()} carts')
+            return
+        cart_ids = list(Cart.objects.out_of_sync().values_list('pk', flat=True))
+        for cart in Cart.objects.filter(pk__in=cart_ids).with_computed_totals():
+            print(f'Cart id={cart.pk}: stored total_cost={cart.total_cost} items_count={cart.items_count}, '
+                  f'actual total_cost={cart.computed_total_cost} items_count={cart.computed_items_count}')
+        print(f'Inconsistent carts: {len(cart_ids)}')
+        if cart_ids and options['fix']:
+            print(f'Rebuilt totals of {Cart.objects.filter(pk__in=cart_ids).rebuild_totals()} carts')
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from carts.models import Cart, CartItem
+from items.cache import catalog_cache
+from items.models import Item
+from stepik_packages.query_budget import assert_flat_query_count, QueryBudgetExceeded
+from users.authentication import get_token_user_cache
+from users.models import User
+
+ROW_COUNTS = (1, 6)
+# The responses of the rolled back rows are cached apart from the caches shared with the web server
+ISOLATED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'catalog': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'catalog'},
+}
+
+
+class Command(BaseCommand):
+    help = "Check that the cart and item endpoints don't run more queries for more rows"  # noqa: A003
+
+    budgets = {
+        '/api/v1/carts/': 2,
+        '/api/v1/carts/items/': 2,
+        '/api/v1/items/': 2,
+        '/api/v1/items/{item_pk}/': 1,
+    }
+
+    def prepare_data(self):
+        self.items = [
+            Item.objects.create(title=f'Budget item {number}', description='', image='items/budget.jpg', weight=100,
+                                price=Decimal('10.00'))
+            for number in range(max(ROW_COUNTS))
+        ]
+        self.user = User.objects.create(username='query_budget', email='query_budget@example.com', phone='+79990000000')
+        Cart.objects.create(user=self.user)
+        self.client = APIClient(SERVER_NAME='localhost')
+        get_token_user_cache.cache_clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        # Warm up the token authentication cache, so all the runs see it in the same state
+        self.client.get('/api/v1/users/current')
+
+    def fill_cart(self, size):
+        cart = self.user.my_cart
+        cart.cart_items.all().delete()
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, item=item, quantity=1, price=item.price) for item in self.items[:size]
+        )
+        Cart.objects.filter(pk=cart.pk).rebuild_totals()
+        # Measure the uncached catalog responses
+        catalog_cache.bump_version()
+
+    def check_endpoint(self, url, budget):
+        def run(size):
+            response = self.client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'GET {url} returned {response.status_code}')
+
+        count = assert_flat_query_count(run, ROW_COUNTS, limit=budget, prepare=self.fill_cart, label=f'GET {url}')
+        print(f'GET {url}: {count} queries (budget {budget})')
+
+    def check_budgets(self):
+        failures = []
+        with transaction.atomic():
+            self.prepare_data()
+            for url, budget in self.budgets.items():
+                try:
+                    self.check_endpoint(url.format(item_pk=self.items[0].pk), budget)
+                except QueryBudgetExceeded as ex:
+                    failures.append(str(ex))
+            transaction.set_rollback(True)
+        return failures
+
+    def handle(self, *args, **options):
+        try:
+            with override_settings(CACHES=ISOLATED_CACHES):
+                failures = self.check_budgets()
+        finally:
+            # The token cache holds the cache of the versions, drop it with the isolated caches
+            get_token_user_cache.cache_clear()
+        if failures:
+            raise CommandError('\n\n'.join(failures))
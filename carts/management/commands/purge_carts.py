@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from carts.models import Cart, CartItem
+from stepik_packages.importing.arguments import positive_int
+from users.authentication import get_token_user_cache
+
+
+def purge_batch(cart_ids, before):
+    """
+    Delete the carts which are still expired and their cart items in one short
+    transaction and return the numbers of the deleted carts and cart items.
+    The transaction starts with a write, so SQLite takes the write lock first
+    and the purge never fails on upgrading a read lock under live traffic.
+    """
+    carts = Cart.objects.filter(pk__in=cart_ids).expired(before)
+    with transaction.atomic():
+        items = CartItem.objects.filter(cart__in=carts).delete()[0]
+        deleted = carts.delete()[1].get(Cart._meta.label, 0)
+    return deleted, items
+
+
+def invalidate_cached_users(user_ids):
+    """The cached users of the tokens refer to the deleted carts, `User.my_cart` creates new ones."""
+    cache = get_token_user_cache()
+    for key in Token.objects.filter(user__in=user_ids).values_list('key', flat=True):
+        cache.invalidate(key)
+
+
+class Command(BaseCommand):
+    help = 'Delete the carts without activity for the given days with their cart items'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-d',
+            '--days',
+            type=int,
+            help='Days without activity after which a cart is expired',
+            default=30)
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=positive_int,
+            help='Number of carts deleted by one transaction',
+            default=500)
+        parser.add_argument(
+            '-s',
+            '--sleep',
+            type=float,
+            help='Seconds to sleep between the batches, leaves the database to the live requests',
+            default=0.1)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the expired carts and their cart items')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        before = timezone.now() - timedelta(days=options['days'])
+        expired = Cart.objects.expired(before)
+        if options['dry_run']:
+            items = CartItem.objects.filter(cart__in=expired).count()
+            print(f'Expired carts: {expired.count()}, cart items: {items}')
+            return
+        carts = items = batches = 0
+        while True:
+            # The oldest expired carts are found by the index of last_activity
+            batch = list(expired.order_by('last_activity').values_list('pk', 'user')[:options['batch_size']])
+            if not batch:
+                break
+            batch_carts, batch_items = purge_batch([cart_id for cart_id, _ in batch], before)
+            invalidate_cached_users([user_id for _, user_id in batch])
+            carts += batch_carts
+            items += batch_items
+            batches += 1
+            if len(batch) < options['batch_size']:
+                break
+            time.sleep(options['sleep'])
+        elapsed = time.monotonic() - started
+        print(f'Deleted carts: {carts}, cart items: {items}, batches: {batches}')
+        print(f'Elapsed: {elapsed:.2f}s')
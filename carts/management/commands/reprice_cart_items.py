@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from carts.models import CartItem
+from stepik_packages.importing.arguments import positive_int
+
+
+class Command(BaseCommand):
+    help = 'Set the cart item prices to the current prices of the items and update the cart totals'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=positive_int,
+            help='Range of item ids repriced by one UPDATE',
+            default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the cart items with stale prices')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['dry_run']:
+            print(f'Cart items with stale prices: {CartItem.objects.stale().count()}')
+            return
+        bounds = CartItem.objects.aggregate(first=Min('item'), last=Max('item'))
+        repriced = carts = 0
+        if bounds['first'] is not None:
+            # Item id ranges keep every UPDATE and its lock short on millions of cart items
+            for start in range(bounds['first'], bounds['last'] + 1, options['batch_size']):
+                lines = CartItem.objects.filter(item__gte=start, item__lt=start + options['batch_size'])
+                batch_repriced, batch_carts = lines.reprice()
+                repriced += batch_repriced
+                carts += batch_carts
+        elapsed = time.monotonic() - started
+        print(f'Repriced cart items: {repriced}, cart totals updated: {carts}')
+        print(f'Elapsed: {elapsed:.2f}s')
@@ -0,0 +1,44 @@
+# Generated by Django 3.1.5 on 2026-10-17 17:52
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def rebuild_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('carts', 'Cart')
+    CartItem = apps.get_model('carts', 'CartItem')
+    total_cost_field = DecimalField(decimal_places=2, max_digits=10)
+    lines = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+    line_total = ExpressionWrapper(F('quantity') * F('price'), output_field=total_cost_field)
+    Cart.objects.update(
+        total_cost=Coalesce(Subquery(lines.annotate(total=Sum(line_total)).values('total'), output_field=total_cost_field), 0),
+        items_count=Coalesce(Subquery(lines.annotate(count=Sum('quantity')).values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='cart',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='carts.cart'),
+        ),
+        migrations.RunPython(rebuild_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.1.5 on 2026-10-17 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+import django.db.models.deletion
+
+
+def merge_duplicate_carts(apps, schema_editor):
+    Cart = apps.get_model('carts', 'Cart')
+    CartItem = apps.get_model('carts', 'CartItem')
+    duplicates = Cart.objects.values('user').annotate(carts=Count('pk'), first_cart=Min('pk')).filter(carts__gt=1)
+    for duplicate in duplicates:
+        carts = Cart.objects.filter(user=duplicate['user'])
+        totals = carts.aggregate(total_cost=Sum('total_cost'), items_count=Sum('items_count'))
+        extra_carts = carts.exclude(pk=duplicate['first_cart'])
+        CartItem.objects.filter(cart__in=extra_carts).update(cart_id=duplicate['first_cart'])
+        extra_carts.delete()
+        Cart.objects.filter(pk=duplicate['first_cart']).update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('carts', '0002_cart_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_carts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cart',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
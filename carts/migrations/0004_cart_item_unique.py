@@ -0,0 +1,48 @@
+# Generated by Django 3.1.5 on 2026-10-17 18:31
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    Cart = apps.get_model('carts', 'Cart')
+    CartItem = apps.get_model('carts', 'CartItem')
+    duplicates = (
+        CartItem.objects.values('cart', 'item')
+        .annotate(lines=Count('pk'), first_line=Min('pk'), quantity=Sum('quantity'))
+        .filter(lines__gt=1)
+        .order_by()
+    )
+    cart_ids = set()
+    for duplicate in duplicates:
+        # The merged line keeps the price of the first added line
+        CartItem.objects.filter(pk=duplicate['first_line']).update(quantity=duplicate['quantity'])
+        CartItem.objects.filter(cart=duplicate['cart'], item=duplicate['item']).exclude(
+            pk=duplicate['first_line'],
+        ).delete()
+        cart_ids.add(duplicate['cart'])
+    if not cart_ids:
+        return
+    total_cost_field = DecimalField(decimal_places=2, max_digits=10)
+    lines = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+    line_total = ExpressionWrapper(F('quantity') * F('price'), output_field=total_cost_field)
+    Cart.objects.filter(pk__in=cart_ids).update(
+        total_cost=Coalesce(Subquery(lines.annotate(total=Sum(line_total)).values('total'), output_field=total_cost_field), 0),
+        items_count=Coalesce(Subquery(lines.annotate(count=Sum('quantity')).values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carts', '0003_cart_user_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'item'), name='unique_cart_item'),
+        ),
+    ]
@@ -1,22 +1,144 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from items.models import Item
 
+TOTAL_COST_FIELD = DecimalField(decimal_places=2, max_digits=10)
+
+
+def line_total(prefix=''):
+    return ExpressionWrapper(F(f'{prefix}quantity') * F(f'{prefix}price'), output_field=TOTAL_COST_FIELD)
+
+
+def line_price_delta():
+    return ExpressionWrapper(F('quantity') * (F('item__price') - F('price')), output_field=TOTAL_COST_FIELD)
+
+
+class CartItemQuerySet(models.QuerySet):
+    def with_item(self, item_fields=None):
+        queryset = self.select_related('item')
+        if item_fields is not None:
+            queryset = queryset.only(
+                'id', 'cart', 'quantity', 'price', 'item',
+                *(f'item__{field}' for field in item_fields),
+            )
+        return queryset
+
+    def add_item(self, cart, item, quantity):
+        """
+        Add the quantity of the item to its cart item, creating the cart item at
+        the current price of the item when the cart has none, and shift the
+        cart totals. The quantity is incremented by an UPDATE with F(), so
+        concurrent adds of the same item are never lost, and an INSERT losing
+        the race to a concurrent one falls back to the increment.
+        """
+        with transaction.atomic():
+            lines = self.filter(cart=cart, item=item)
+            if not lines.update(quantity=F('quantity') + quantity):
+                try:
+                    with transaction.atomic():
+                        line = self.create(cart=cart, item=item, quantity=quantity, price=item.price)
+                except IntegrityError:
+                    lines.update(quantity=F('quantity') + quantity)
+                else:
+                    line.shift_cart_totals(line.total_price, quantity)
+                    return line
+            line = lines.get()
+            line.shift_cart_totals(quantity * line.price, quantity)
+        return line
+
+    def stale(self):
+        """Cart items whose price differs from the current price of their item."""
+        return self.exclude(price=F('item__price'))
+
+    def reprice(self):
+        """
+        Set the price of the stale cart items to the current price of their
+        items and shift the stored totals of their carts by the difference.
+        Both are set-based UPDATEs, no row is loaded. Return the numbers of
+        the repriced cart items and the updated carts.
+        """
+        stale = self.stale().order_by()
+        carts = 0
+        with transaction.atomic():
+            if settings.CARTS_STORE_TOTALS:
+                deltas = stale.filter(cart=OuterRef('pk')).values('cart').annotate(delta=Sum(line_price_delta()))
+                carts = Cart.objects.filter(pk__in=stale.values('cart')).update(
+                    total_cost=F('total_cost') + Subquery(deltas.values('delta'), output_field=TOTAL_COST_FIELD),
+                )
+            prices = Item.objects.filter(pk=OuterRef('item')).values('price')
+            return stale.update(price=Subquery(prices)), carts
+
+
+def prefetch_cart_items(item_fields=None):
+    return Prefetch('cart_items', queryset=CartItem.objects.with_item(item_fields).order_by('pk'))
+
+
+class CartQuerySet(models.QuerySet):
+    def with_items(self, item_fields=None):
+        return self.prefetch_related(prefetch_cart_items(item_fields))
+
+    def with_computed_totals(self):
+        return self.annotate(
+            computed_total_cost=Coalesce(Sum(line_total('cart_items__')), 0, output_field=TOTAL_COST_FIELD),
+            computed_items_count=Coalesce(Sum('cart_items__quantity'), 0),
+        )
+
+    def out_of_sync(self):
+        return self.with_computed_totals().filter(
+            ~Q(total_cost=F('computed_total_cost')) | ~Q(items_count=F('computed_items_count')),
+        )
+
+    def shift_totals(self, cost_delta, count_delta):
+        return self.update(
+            total_cost=F('total_cost') + cost_delta,
+            items_count=F('items_count') + count_delta,
+        )
+
+    def record_change(self, cost_delta, count_delta):
+        """Record a change of the cart items: the activity time and the stored totals."""
+        fields = {'last_activity': timezone.now()}
+        if settings.CARTS_STORE_TOTALS:
+            fields.update(total_cost=F('total_cost') + cost_delta, items_count=F('items_count') + count_delta)
+        return self.update(**fields)
+
+    def expired(self, before):
+        return self.filter(last_activity__lt=before)
+
+    def rebuild_totals(self):
+        lines = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+        total_cost = lines.annotate(total_cost=Sum(line_total())).values('total_cost')
+        items_count = lines.annotate(items_count=Sum('quantity')).values('items_count')
+        return self.update(
+            total_cost=Coalesce(Subquery(total_cost, output_field=TOTAL_COST_FIELD), 0),
+            items_count=Coalesce(Subquery(items_count), 0),
+        )
+
 
 class Cart(models.Model):
     items = models.ManyToManyField(Item, through='CartItem')
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart')
+    total_cost = models.DecimalField(decimal_places=2, max_digits=10, default=0)
+    items_count = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = CartQuerySet.as_manager()
 
     def __str__(self):
         return f'Cart {self.pk} of user {self.user.username}'
 
-    @property
-    def total_cost(self):
-        total_cost = 0
-        for cart_item in self.cart_items.all():
-            total_cost += cart_item.total_price
-        return total_cost
+    def shift_totals(self, cost_delta, count_delta):
+        Cart.objects.filter(pk=self.pk).record_change(cost_delta, count_delta)
+
+    def touch(self):
+        """Record a read of the cart, at most once per CARTS_ACTIVITY_RESOLUTION."""
+        now = timezone.now()
+        if self.last_activity < now - settings.CARTS_ACTIVITY_RESOLUTION:
+            Cart.objects.filter(pk=self.pk).update(last_activity=now)
+            self.last_activity = now
 
 
 class CartItem(models.Model):
@@ -25,9 +147,19 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(decimal_places=2, max_digits=8)
 
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'item'], name='unique_cart_item'),
+        ]
+
     def __str__(self):
         return f'CartItem {self.pk} of cart {self.cart.pk}'
 
     @property
     def total_price(self):
         return self.quantity * self.price
+
+    def shift_cart_totals(self, cost_delta, count_delta):
+        Cart.objects.filter(pk=self.cart_id).record_change(cost_delta, count_delta)
@@ -1,3 +1,7 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import Cart, CartItem
@@ -8,7 +12,7 @@ from items.serializers import ItemSerializer
 class CartItemSerializer(serializers.ModelSerializer):
     item = ItemSerializer(read_only=True)
     item_id = serializers.PrimaryKeyRelatedField(source='item', queryset=Item.objects.all())
-    total_price = serializers.DecimalField(decimal_places=2, max_digits=8)
+    total_price = serializers.DecimalField(decimal_places=2, max_digits=10, read_only=True)
 
     class Meta:
         model = CartItem
@@ -19,31 +23,185 @@ class CartItemSerializer(serializers.ModelSerializer):
             'quantity': {'required': True},
         }
 
+    def validate_item_id(self, item):
+        cart_items = self.context['request'].user.my_cart.cart_items
+        if self.instance is not None and self.instance.item_id != item.pk and cart_items.filter(item=item).exists():
+            raise serializers.ValidationError('The item is already in the cart.')
+        return item
+
     def create(self, validated_data):
         cart = self.context['request'].user.my_cart
-        cart_item = CartItem(
-            item=validated_data['item'],
-            quantity=validated_data['quantity'],
-            price=validated_data['item'].price,
-            cart=cart,
-        )
-        cart_item.save()
-        return cart_item
+        return CartItem.objects.add_item(cart, validated_data['item'], validated_data['quantity'])
 
     def update(self, instance, validated_data):
+        old_total_price, old_quantity = instance.total_price, instance.quantity
         if 'item' in validated_data:
             instance.item = validated_data['item']
             instance.price = validated_data['item'].price
         instance.quantity = validated_data.get('quantity', instance.quantity)
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            instance.shift_cart_totals(instance.total_price - old_total_price, instance.quantity - old_quantity)
         return instance
 
 
 class CartSerializer(serializers.ModelSerializer):
-    total_cost = serializers.DecimalField(decimal_places=2, max_digits=8)
+    total_cost = serializers.DecimalField(decimal_places=2, max_digits=10, read_only=True)
     items = CartItemSerializer(source='cart_items', many=True)
 
     class Meta:
         model = Cart
-        fields = ['id', 'items', 'total_cost']
-        read_only_fields = ['id']
+        fields = ['id', 'items', 'items_count', 'total_cost']
+        read_only_fields = ['id', 'items_count']
+
+
+class CartOperationSerializer(serializers.Serializer):
+    ADD = 'add'
+    UPDATE = 'update'
+    REMOVE = 'remove'
+
+    op = serializers.ChoiceField(choices=[ADD, UPDATE, REMOVE])
+    id = serializers.IntegerField(required=False, help_text='Cart item id of update and remove')  # noqa: A003
+    item_id = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(required=False, min_value=0)
+
+    required_fields = {
+        ADD: ['item_id', 'quantity'],
+        UPDATE: ['id'],
+        REMOVE: ['id'],
+    }
+
+    def validate(self, attrs):
+        errors = {
+            name: [serializers.Field.default_error_messages['required']]
+            for name in self.required_fields[attrs['op']] if name not in attrs
+        }
+        if attrs['op'] == self.UPDATE and 'item_id' not in attrs and 'quantity' not in attrs:
+            errors['non_field_errors'] = ['Update requires item_id or quantity.']
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Operations applied to the cart of the user in one transaction: add an item,
+    update or remove a cart item. Items and cart items are fetched by one query
+    each, and the cart totals are shifted once.
+    """
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        if len(operations) > settings.CARTS_BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {settings.CARTS_BATCH_MAX_OPERATIONS} elements.',
+            )
+        line_ids = [operation['id'] for operation in operations if operation['op'] != CartOperationSerializer.ADD]
+        if len(line_ids) != len(set(line_ids)):
+            raise serializers.ValidationError('A cart item may be updated or removed once in a batch.')
+        return operations
+
+    def validate(self, attrs):
+        item_ids = {operation['item_id'] for operation in attrs['operations'] if 'item_id' in operation}
+        attrs['items'] = Item.objects.only('id', 'price').in_bulk(item_ids)
+        errors = [f'Item {item_id} does not exist.' for item_id in sorted(item_ids - set(attrs['items']))]
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+        return attrs
+
+    def load_lines(self, cart, operations):
+        """Load the cart items of the operations, locking them until the end of the transaction."""
+        item_ids = {operation['item_id'] for operation in operations if 'item_id' in operation}
+        line_ids = {operation['id'] for operation in operations if operation['op'] != CartOperationSerializer.ADD}
+        # The cart items of the added items are loaded too, an added item is merged into its cart item
+        lines = cart.cart_items.select_for_update().filter(Q(pk__in=line_ids) | Q(item__in=item_ids)).in_bulk()
+        errors = [f'Cart item {line_id} does not exist.' for line_id in sorted(line_ids - set(lines))]
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+        return lines
+
+    def apply_operations(self, cart, operations, items, lines):
+        """
+        Apply the operations to the cart items in memory and return the changed
+        and new cart items and the ids of the removed ones.
+        """
+        lines_by_item = {line.item_id: line for line in lines.values()}
+        removed_ids = []
+        for operation in operations:
+            if operation['op'] == CartOperationSerializer.REMOVE:
+                line = lines[operation['id']]
+                del lines_by_item[line.item_id]
+                removed_ids.append(line.pk)
+            elif operation['op'] == CartOperationSerializer.ADD:
+                line = lines_by_item.get(operation['item_id'])
+                if line is None:
+                    item = items[operation['item_id']]
+                    line = lines_by_item[item.pk] = CartItem(cart=cart, item=item, quantity=0, price=item.price)
+                line.quantity += operation['quantity']
+            else:
+                self.update_line(lines[operation['id']], operation, items, lines_by_item)
+        return list(lines_by_item.values()), removed_ids
+
+    def update_line(self, line, operation, items, lines_by_item):
+        if operation.get('item_id', line.item_id) != line.item_id:
+            item = items[operation['item_id']]
+            if item.pk in lines_by_item:
+                raise serializers.ValidationError({'operations': [f'Item {item.pk} is already in the cart.']})
+            del lines_by_item[line.item_id]
+            line.item, line.price = item, item.price
+            lines_by_item[item.pk] = line
+        line.quantity = operation.get('quantity', line.quantity)
+
+    def update_lines(self, changed_lines, updated_ids, loaded_quantities):
+        """Write the changed cart items, the ones only added to get their quantities incremented with F()."""
+        quantities = {line.pk: line.quantity for line in changed_lines}
+        for line in changed_lines:
+            if line.pk not in updated_ids:
+                line.quantity = F('quantity') + (line.quantity - loaded_quantities[line.pk])
+        CartItem.objects.bulk_update(changed_lines, ['item', 'quantity', 'price'])
+        for line in changed_lines:
+            line.quantity = quantities[line.pk]
+
+    def insert_lines(self, cart, new_lines):
+        """Insert the new cart items and return the ones the cart totals are not shifted for yet."""
+        try:
+            with transaction.atomic():
+                return CartItem.objects.bulk_create(new_lines)
+        except IntegrityError:
+            pass
+        # A concurrent request has added one of the items, add_item merges the quantities and shifts the totals
+        for line in new_lines:
+            CartItem.objects.add_item(cart, line.item, line.quantity)
+        return []
+
+    def create(self, validated_data):
+        cart = self.context['request'].user.my_cart
+        operations = validated_data['operations']
+        updated_ids = {operation['id'] for operation in operations if operation['op'] == CartOperationSerializer.UPDATE}
+        try:
+            with transaction.atomic():
+                # The first write takes the write lock like add_item does, so the cart items read below
+                # include every committed change and no other write lands until the commit
+                Cart.objects.filter(pk=cart.pk).update(last_activity=timezone.now())
+                lines = self.load_lines(cart, operations)
+                loaded_quantities = {line.pk: line.quantity for line in lines.values()}
+                old_cost = sum(line.total_price for line in lines.values())
+                old_count = sum(loaded_quantities.values())
+                lines, removed_ids = self.apply_operations(cart, operations, validated_data['items'], lines)
+                if removed_ids:
+                    cart.cart_items.filter(pk__in=removed_ids).delete()
+                changed_lines = [line for line in lines if line.pk is not None]
+                new_lines = [line for line in lines if line.pk is None]
+                if changed_lines:
+                    self.update_lines(changed_lines, updated_ids, loaded_quantities)
+                if new_lines:
+                    new_lines = self.insert_lines(cart, new_lines)
+                written = [*changed_lines, *new_lines]
+                cart.shift_totals(
+                    sum(line.total_price for line in written) - old_cost,
+                    sum(line.quantity for line in written) - old_count,
+                )
+        except IntegrityError:
+            # A concurrent request has added the item an update moves its cart item to
+            raise serializers.ValidationError({'operations': ['The cart has changed, retry the operations.']})
+        return cart
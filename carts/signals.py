@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import CartItem
+from items.models import Item
+
+
+@receiver(pre_save, sender=Item)
+def item_saving(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'price' not in update_fields:
+        instance.price_changed = False
+        return
+    stored = sender.objects.filter(pk=instance.pk).values_list('price', flat=True).first() if instance.pk else None
+    instance.price_changed = stored is not None and stored != sender._meta.get_field('price').to_python(instance.price)
+
+
+@receiver(post_save, sender=Item)
+def reprice_cart_items(sender, instance, created, **kwargs):
+    if created or not getattr(instance, 'price_changed', False):
+        return
+    instance.price_changed = False
+    CartItem.objects.filter(item=instance).reprice()
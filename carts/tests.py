@@ -0,0 +1,150 @@
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from django.db import connection
+from django.test import override_settings, TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from carts.management.commands.check_query_budgets import Command as QueryBudgetsCommand, ISOLATED_CACHES
+from carts.models import Cart, CartItem
+from items.cache import catalog_cache
+from items.models import Item
+from stepik_packages.query_budget import assert_flat_query_count
+from users.authentication import get_token_user_cache
+from users.models import User
+
+ROW_COUNTS = (1, 6)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class QueryBudgetTests(TestCase):
+    """The cart and item endpoints run a fixed number of queries, whatever the number of rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = [
+            Item.objects.create(title=f'Budget item {number}', description='', image='items/budget.jpg', weight=100,
+                                price=Decimal('10.00'))
+            for number in range(max(ROW_COUNTS))
+        ]
+        cls.user = User.objects.create(username='query_budget', email='query_budget@example.com', phone='+79990000000')
+        cls.cart = Cart.objects.create(user=cls.user)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        get_token_user_cache.cache_clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # Warm up the token authentication cache, so all the runs see it in the same state
+        self.client.get('/api/v1/users/current')
+
+    def tearDown(self):
+        get_token_user_cache.cache_clear()
+
+    def fill_cart(self, size):
+        self.cart.cart_items.all().delete()
+        CartItem.objects.bulk_create(
+            CartItem(cart=self.cart, item=item, quantity=1, price=item.price) for item in self.items[:size]
+        )
+        Cart.objects.filter(pk=self.cart.pk).rebuild_totals()
+        # Measure the uncached catalog responses
+        catalog_cache.bump_version()
+
+    def assert_budget(self, url):
+        budget = QueryBudgetsCommand.budgets[url]
+        url = url.format(item_pk=self.items[0].pk)
+
+        def run(size):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+        assert_flat_query_count(run, ROW_COUNTS, limit=budget, prepare=self.fill_cart, label=f'GET {url}')
+
+    def test_cart(self):
+        self.assert_budget('/api/v1/carts/')
+
+    def test_cart_items(self):
+        self.assert_budget('/api/v1/carts/items/')
+
+    def test_items(self):
+        self.assert_budget('/api/v1/items/')
+
+    def test_item(self):
+        self.assert_budget('/api/v1/items/{item_pk}/')
+
+    def test_cached_item(self):
+        url = f'/api/v1/items/{self.items[0].pk}/'
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ConcurrentAddTests(TransactionTestCase):
+    """Concurrent adds of the same items to one cart keep one cart item per item and lose no quantity."""
+
+    threads = 8
+    adds = 25
+
+    def setUp(self):
+        self.items = [
+            Item.objects.create(title=f'Item {number}', description='', image='items/budget.jpg', weight=100,
+                                price=Decimal('150.00'))
+            for number in range(3)
+        ]
+        self.user = User.objects.create(username='buyer', email='buyer@example.com', phone='+79990000000')
+        self.cart = Cart.objects.create(user=self.user)
+
+    def add_items(self, barrier, errors):
+        barrier.wait()
+        try:
+            for number in range(self.adds):
+                CartItem.objects.add_item(self.cart, self.items[number % len(self.items)], 1)
+        except Exception as ex:
+            errors.append(ex)
+        finally:
+            connection.close()
+
+    def add_batches(self, barrier, errors):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        operations = [{'op': 'add', 'item_id': item.pk, 'quantity': 1} for item in self.items]
+        barrier.wait()
+        try:
+            for _ in range(self.adds):
+                response = client.post('/api/v1/carts/items/batch/', {'operations': operations}, format='json')
+                if response.status_code != 200:
+                    errors.append(response.content)
+        finally:
+            connection.close()
+
+    def run_threads(self, target):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+        threads = [threading.Thread(target=target, args=(barrier, errors)) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assert_cart(self, expected):
+        lines = list(self.cart.cart_items.values_list('item', 'quantity'))
+        self.assertEqual(len(lines), len(expected))
+        self.assertEqual(dict(lines), expected)
+        cart = Cart.objects.with_computed_totals().get(pk=self.cart.pk)
+        self.assertEqual((cart.total_cost, cart.items_count), (cart.computed_total_cost, cart.computed_items_count))
+
+    def test_concurrent_adds(self):
+        self.run_threads(self.add_items)
+        adds = Counter(self.items[number % len(self.items)].pk for number in range(self.adds))
+        self.assert_cart({item_id: count * self.threads for item_id, count in adds.items()})
+
+    def test_concurrent_batch_adds(self):
+        CartItem.objects.add_item(self.cart, self.items[0], 1)
+        self.run_threads(self.add_batches)
+        expected = {item.pk: self.adds * self.threads for item in self.items}
+        expected[self.items[0].pk] += 1
+        self.assert_cart(expected)
@@ -1,22 +1,57 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404
-from rest_framework.authentication import TokenAuthentication
 from rest_framework import mixins
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from .models import Cart, CartItem
+from .models import Cart, CartItem, prefetch_cart_items
 from .paginations import CartItemLimitOffsetPagination
-from .serializers import CartSerializer, CartItemSerializer
+from .serializers import CartBatchSerializer, CartSerializer, CartItemSerializer
+from items.serializers import ItemSerializer
+
+
+def load_cart(cart, refresh_totals=False):
+    """Return the cart with its items and totals for CartSerializer."""
+    if settings.CARTS_STORE_TOTALS:
+        fields = ['total_cost', 'items_count'] if refresh_totals else list(cart.get_deferred_fields())
+        if fields:
+            cart.refresh_from_db(fields=fields)
+        prefetch_related_objects([cart], prefetch_cart_items(ItemSerializer.model_fields))
+        return cart
+    cart = Cart.objects.with_items(ItemSerializer.model_fields).with_computed_totals().get(pk=cart.pk)
+    cart.total_cost = cart.computed_total_cost
+    cart.items_count = cart.computed_items_count
+    return cart
+
+
+def get_user_cart(user):
+    """
+    Return the cart of the user for a write. The cart of a cached user has
+    its data fields deferred and may be deleted by now, then the user gets a
+    new cart instead of failing on the foreign key.
+    """
+    cart = user.my_cart
+    if cart.get_deferred_fields() and not Cart.objects.filter(pk=cart.pk).exists():
+        cart = user.reset_cart()
+    return cart
 
 
 class CartViewSet(mixins.RetrieveModelMixin, GenericViewSet):
     queryset = Cart.objects.all()
     serializer_class = CartSerializer
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user.my_cart
+        try:
+            cart = load_cart(self.request.user.my_cart)
+        except Cart.DoesNotExist:
+            cart = load_cart(self.request.user.reset_cart())
+        cart.touch()
+        return cart
 
 
 class CartItemViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
@@ -24,13 +59,37 @@ class CartItemViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
     queryset = CartItem.objects.all()
     serializer_class = CartItemSerializer
     pagination_class = CartItemLimitOffsetPagination
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in ('create', 'batch'):
+            get_user_cart(request.user)
+
     def get_queryset(self):
-        queryset = self.request.user.my_cart
-        return queryset.cart_items.all()
+        if getattr(self, 'swagger_fake_view', False):
+            # The schema generation runs the view without a user
+            return super().get_queryset().none()
+        cart = self.request.user.my_cart
+        return cart.cart_items.with_item(ItemSerializer.model_fields).order_by('pk')
 
     def get_object(self):
-        queryset = self.request.user.my_cart
-        return get_object_or_404(queryset.cart_items, pk=self.kwargs['pk'])
+        return get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            instance.shift_cart_totals(-instance.total_price, -instance.quantity)
+
+    def get_serializer_class(self):
+        if self.action == 'batch':
+            return CartBatchSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Apply the add, update and remove operations to the cart at once and return the cart."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = load_cart(serializer.save(), refresh_totals=True)
+        return Response(CartSerializer(cart, context=self.get_serializer_context()).data)
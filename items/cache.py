@@ -0,0 +1,3 @@
+from stepik_packages.caching import VersionedResponseCache
+
+catalog_cache = VersionedResponseCache('items-catalog', 'ITEMS_CATALOG_CACHE')
@@ -1,6 +1,10 @@
+from django.db import connections
 from django_filters.rest_framework import FilterSet
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.filters import BaseFilterBackend
 
 from .models import Item
+from .search import is_ranked, search_items, SEARCH_RANK
 
 
 class ItemFilter(FilterSet):
@@ -10,3 +14,44 @@ class ItemFilter(FilterSet):
             'price': ['gte', 'lte', 'gt', 'lt'],
             'weight': ['gte', 'lte', 'gt', 'lt'],
         }
+
+
+class ItemSearchFilter(BaseFilterBackend):
+    """
+    Full-text search by `?search=` over the item title and description.
+    Without an explicit `?ordering=` the results are ordered by relevance.
+    """
+
+    search_param = 'search'
+    ordering_param = 'ordering'
+    search_description = 'Words to search in the title and description, matched by prefix.'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        queryset = search_items(queryset, term, connections[queryset.db])
+        if self.ordering_param not in request.query_params and is_ranked(queryset):
+            queryset = queryset.order_by(SEARCH_RANK, 'id')
+        return queryset
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(
+                name=self.search_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(title='Search', description=self.search_description),
+            ),
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': self.search_description,
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -0,0 +1,70 @@
+"""
+Variants of the item images (ITEM_IMAGE_VARIANTS): thumbnails and WebP versions
+generated with Pillow at import or upload time, by `regenerate_item_images`,
+or on the first request of a variant. A variant is named after its original,
+so items sharing an image share its variants too.
+"""
+import io
+import os
+import posixpath
+import threading
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .storage import item_image_storage
+
+EXTENSIONS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+    'PNG': 'png',
+}
+
+
+def variant_name(image_name, variant):
+    options = settings.ITEM_IMAGE_VARIANTS[variant]
+    stem = posixpath.splitext(posixpath.relpath(image_name, settings.MEDIA_ITEMS_IMAGE_DIR))[0]
+    return posixpath.join(settings.MEDIA_ITEMS_VARIANTS_DIR, variant, f'{stem}.{EXTENSIONS[options["FORMAT"]]}')
+
+
+def render_variant(image_file, options):
+    """Return the bytes of the variant of the image file."""
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        if options['SIZE']:
+            image.thumbnail(options['SIZE'], Image.LANCZOS)
+        if options['FORMAT'] == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, options['FORMAT'], quality=options['QUALITY'])
+        return buffer.getvalue()
+
+
+def generate_variant(image_name, variant, force=False, storage=item_image_storage):
+    """
+    Generate the variant unless it exists and return its name. The file is
+    written under a temporary name and renamed, so concurrent requests of a new
+    variant never see a partial file.
+    """
+    name = variant_name(image_name, variant)
+    if not force and storage.exists(name):
+        return name
+    with storage.open(image_name) as image_file:
+        content = render_variant(image_file, settings.ITEM_IMAGE_VARIANTS[variant])
+    path = storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(content)
+    os.replace(temporary_path, path)
+    return name
+
+
+def generate_variants(image_name, variants=None, force=False):
+    return [generate_variant(image_name, variant, force) for variant in variants or settings.ITEM_IMAGE_VARIANTS]
+
+
+def variant_url(image_name, variant, storage=item_image_storage):
+    """Return the media URL of the generated variant or None."""
+    name = variant_name(image_name, variant)
+    return storage.url(name) if storage.exists(name) else None
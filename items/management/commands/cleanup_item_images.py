@@ -0,0 +1,60 @@
+import posixpath
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from items.images import variant_name
+from items.models import Item, ItemImageSource
+from items.storage import item_image_storage
+
+DELETE_BATCH_SIZE = 500
+
+
+def iter_files(storage, directory):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for subdirectory in directories:
+        yield from iter_files(storage, posixpath.join(directory, subdirectory))
+
+
+def find_orphans(storage, directory, referenced):
+    if not storage.exists(directory):
+        return []
+    return [name for name in iter_files(storage, directory) if name not in referenced]
+
+
+class Command(BaseCommand):
+    help = 'Remove the item images and image variants which no item references'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the unreferenced images')
+
+    def handle(self, *args, **options):
+        storage = item_image_storage
+        image_names = set(Item.objects.exclude(image='').values_list('image', flat=True))
+        variant_names = {
+            variant_name(image_name, variant)
+            for image_name in image_names for variant in settings.ITEM_IMAGE_VARIANTS
+        }
+        orphans = find_orphans(storage, settings.MEDIA_ITEMS_IMAGE_DIR, image_names)
+        orphan_variants = find_orphans(storage, settings.MEDIA_ITEMS_VARIANTS_DIR, variant_names)
+        size = sum(storage.size(name) for name in orphans + orphan_variants)
+        for name in orphans + orphan_variants:
+            print(name)
+        if options['dry_run']:
+            print(f'Unreferenced images: {len(orphans)}, variants: {len(orphan_variants)}, {size / 2 ** 20:.1f} MiB')
+            return
+        for name in orphans + orphan_variants:
+            storage.delete(name)
+        # The sources of the removed files are downloaded anew by the next import
+        sources = 0
+        for start in range(0, len(orphans), DELETE_BATCH_SIZE):
+            sources += ItemImageSource.objects.filter(name__in=orphans[start:start + DELETE_BATCH_SIZE]).delete()[0]
+        print(
+            f'Removed images: {len(orphans)}, variants: {len(orphan_variants)}, {size / 2 ** 20:.1f} MiB, '
+            f'import sources: {sources}',
+        )
@@ -1,22 +1,32 @@
-import json
-import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-import jsonschema
-from django.conf import settings
-from django.core.files import File
-from django.core.files.storage import default_storage
-from django.core.files.temp import NamedTemporaryFile
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.db.utils import IntegrityError
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
-from items.models import Item
+from carts.models import CartItem
+from items.cache import catalog_cache
+from items.models import Item, ItemImageSource
+from items.images import generate_variants
+from items.storage import fetch_image
+from stepik_packages.importing.arguments import positive_int
+from stepik_packages.importing.checkpoints import ImportCheckpoint
+from stepik_packages.importing.sources import batched, SourceError
+from stepik_packages.importing.updates import update_changed
+from stepik_packages.importing.validation import RecordValidator, RejectsFile
 
 URL_DEFAULT_ITEMS = 'https://raw.githubusercontent.com/stepik-a-w/drf-project-boxes/master/foodboxes.json'
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 100
 
 
 class Command(BaseCommand):
-    BaseCommand.help = 'Import items from JSON data'
+    help = 'Import items from JSON data'  # noqa: A003
 
     json_item_schema = {
         "type": "object",
@@ -28,76 +38,219 @@ class Command(BaseCommand):
             "weight_grams": {"type": "integer"},
             "price": {"type": ["number", "string"]},
         },
+        "required": ["id", "title", "description", "image", "weight_grams", "price"],
     }
+    validator = RecordValidator(json_item_schema)
+    verbosity = 1
 
     def add_arguments(self, parser):
         parser.add_argument(
             '-s',
             '--source',
             type=str,
-            help='Choice source url with JSON data',
+            help='Choice source url or path with JSON or JSONL data, gzip-compressed data is accepted',
             default=URL_DEFAULT_ITEMS)
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=positive_int,
+            help='Number of concurrent image downloads',
+            default=DEFAULT_WORKERS)
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=positive_int,
+            help='Number of items written in one transaction',
+            default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '-r',
+            '--rejects',
+            type=str,
+            help='Path of JSONL file for the rejected records with their errors',
+            default=None)
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the import of the source from its last committed batch')
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Update the existing items changed in the source instead of skipping them')
 
-    def validation_item(self, json_item):
-        result = True
+    def make_session(self, workers):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def fetch_images(self, executor, session, batch, report):
+        """Return the names of the stored images by their URLs, the failed downloads are left out."""
+        urls = {json_item['image'] for json_item in batch}
+        known_sources = ItemImageSource.objects.in_bulk(urls, field_name='url')
+        sources = [known_sources.get(url) or ItemImageSource(url=url) for url in urls]
+        fetched = []
+        now = timezone.now()
+        for source, downloaded in zip(sources, executor.map(lambda source: fetch_image(session, source), sources)):
+            if downloaded is not None:
+                report['downloaded' if downloaded else 'not_modified'] += 1
+                source.checked_at = now
+                fetched.append(source)
+        ItemImageSource.objects.bulk_create([source for source in fetched if source.pk is None])
+        ItemImageSource.objects.bulk_update(
+            [source for source in fetched if source.pk is not None],
+            ['name', 'content_hash', 'etag', 'last_modified', 'checked_at'],
+        )
+        return {source.url: source.name for source in fetched}
+
+    def build_item(self, json_item, image_name):
+        return Item(
+            pk=json_item['id'],
+            title=json_item['title'],
+            description=json_item['description'],
+            image=image_name,
+            weight=json_item['weight_grams'],
+            price=json_item['price'],
+        )
+
+    def log(self, message):
+        """Diagnostics of the failures counted by the report, shown with --verbosity 2."""
+        if self.verbosity >= 2:
+            self.stderr.write(message)
+
+    def write_items(self, new_items, json_items, rejects):
         try:
-            jsonschema.validate(json_item, schema=self.json_item_schema)
-        except jsonschema.exceptions.ValidationError as ex:
-            print(ex)
-            result = False
-        return result
-
-    def create_item(self, json_item):
-        result = True
-        response_image = requests.get(json_item['image'])
-        if response_image:
-            with NamedTemporaryFile() as img_temp:
-                img_temp.write(response_image.content)
-                filename = json_item['image'].split('/')[-1]
-                filepath_upload_to = pathlib.Path(settings.MEDIA_ITEMS_IMAGE_DIR, filename)
-                if pathlib.Path(default_storage.path(filepath_upload_to)).exists():
-                    image_upload = filepath_upload_to.as_posix()
-                else:
-                    image_upload = File(img_temp, filename)
-                try:
-                    new_item = Item(
-                        pk=json_item['id'],
-                        title=json_item['title'],
-                        description=json_item['description'],
-                        image=image_upload,
-                        weight=json_item['weight_grams'],
-                        price=json_item['price'],
-                    )
-                    new_item.save()
-                except (TypeError, IntegrityError) as ex:
-                    print(ex)
-                    result = False
-        else:
-            print(f'Cannot download image from {json_item["image"]}')
-            result = False
-        return result
-
-    def import_data(self, json_data):
-        for json_item in json_data:
-            if self.validation_item(json_item):
-                print(f"Item id={json_item['id']} will be created")
-                if Item.objects.filter(pk=json_item['id']).exists():
-                    print('Item is exist. Created is cancelled')
-                elif self.create_item(json_item):
-                    print('Created is success')
-                else:
-                    print('Created is failed')
+            with transaction.atomic():
+                Item.objects.bulk_create(new_items)
+            return len(new_items)
+        except (TypeError, ValueError, ValidationError, IntegrityError) as ex:
+            self.log(f'Batch of {len(new_items)} items is failed ({ex}). Creating them one by one')
+        created = 0
+        for new_item in new_items:
+            try:
+                with transaction.atomic():
+                    new_item.save(force_insert=True)
+                created += 1
+            except (TypeError, ValueError, ValidationError, IntegrityError) as ex:
+                rejects.write(json_items[new_item.pk], [{'path': '', 'message': f'Cannot create the item: {ex}'}])
+        return created
+
+    def generate_image_variants(self, image_name):
+        try:
+            generate_variants(image_name)
+            return True
+        except OSError as ex:
+            self.log(f'Cannot generate variants of image {image_name}: {ex}')
+            return False
+
+    def import_batch(self, executor, session, batch, rejects, report):
+        image_names = self.fetch_images(executor, session, batch, report)
+        # Pillow releases the GIL while it resizes and encodes, so the threads run in parallel
+        for generated in executor.map(self.generate_image_variants, set(image_names.values())):
+            report['no_variants'] += not generated
+        new_items = []
+        for json_item in batch:
+            image_name = image_names.get(json_item['image'])
+            if image_name is None:
+                rejects.write(json_item, [{'path': 'image', 'message': 'Cannot download the image'}])
+                report['no_image'] += 1
+            else:
+                new_items.append(self.build_item(json_item, image_name))
+        created = self.write_items(new_items, {json_item['id']: json_item for json_item in batch}, rejects)
+        report['created'] += created
+        report['failed'] += len(new_items) - created
+
+    def update_batch(self, json_items, report):
+        changed = update_changed(
+            Item,
+            [self.build_item(json_item, None) for json_item in json_items],
+            ['title', 'description', 'weight', 'price'],
+        )
+        report['updated'] += len(changed)
+        report['exist'] += len(json_items) - len(changed)
+        if changed:
+            # bulk_update sends no post_save, the cart items of the batch are repriced by one UPDATE
+            report['repriced'] += CartItem.objects.filter(item__in=changed).reprice()[0]
+
+    def select_new(self, json_items, existing_ids, report, update=False):
+        """Return the new items and, in the update mode, the existing ones."""
+        new_items, existing_items = [], []
+        for json_item in json_items:
+            if json_item['id'] not in existing_ids:
+                existing_ids.add(json_item['id'])
+                new_items.append(json_item)
+            elif update:
+                existing_items.append(json_item)
             else:
-                print("JSON data of item isn't validation. Skipping creation")
+                report['exist'] += 1
+        return new_items, existing_items
+
+    def import_data(
+        self,
+        records,
+        workers=DEFAULT_WORKERS,
+        batch_size=DEFAULT_BATCH_SIZE,
+        rejects_path=None,
+        update=False,
+        checkpoint=None,
+    ):
+        started = time.monotonic()
+        resumed = checkpoint is not None and checkpoint.offset > 0
+        report = dict.fromkeys(
+            [
+                'total', 'invalid', 'exist', 'no_image', 'created', 'updated', 'repriced', 'failed',
+                'downloaded', 'not_modified', 'no_variants',
+            ],
+            0,
+        )
+        existing_ids = set(Item.objects.values_list('pk', flat=True))
+        with ThreadPoolExecutor(max_workers=workers) as executor, self.make_session(workers) as session, \
+                RejectsFile(rejects_path, append=resumed) as rejects:
+            for source_batch in batched(records, batch_size):
+                report['total'] += len(source_batch)
+                json_items, rejected = self.validator.split(source_batch)
+                rejects.write_many(rejected)
+                report['invalid'] += len(rejected)
+                new_items, existing_items = self.select_new(json_items, existing_ids, report, update)
+                if existing_items:
+                    self.update_batch(existing_items, report)
+                if new_items:
+                    self.import_batch(executor, session, new_items, rejects, report)
+                if checkpoint is not None:
+                    checkpoint.commit(len(source_batch))
+        if report['created'] or report['updated']:
+            catalog_cache.bump_version()
+        self.print_report(report, time.monotonic() - started, rejects_path)
+
+    def print_report(self, report, elapsed, rejects_path=None):
+        print(f"Items in source: {report['total']}")
+        print(f"Created: {report['created']}")
+        print(f"Updated: {report['updated']}")
+        print(f"Cart items repriced: {report['repriced']}")
+        print(f"Skipped as existing: {report['exist']}")
+        print(f"Skipped as invalid: {report['invalid']}")
+        print(f"Skipped without image: {report['no_image']}")
+        print(f"Images downloaded: {report['downloaded']}")
+        print(f"Images not modified since the last import: {report['not_modified']}")
+        print(f"Images without variants: {report['no_variants']}")
+        print(f"Failed: {report['failed']}")
+        print(f'Elapsed: {elapsed:.2f}s')
+        if rejects_path and report['invalid'] + report['no_image'] + report['failed']:
+            print(f'Rejected records are written to {rejects_path}')
 
     def handle(self, *args, **options):
-        response = requests.get(options['source'])
-        if response:
-            try:
-                json_data = response.json()
-            except json.decoder.JSONDecodeError:
-                print("The received data isn't JSON data")
-                return
-            self.import_data(json_data)
+        self.verbosity = options['verbosity']
+        checkpoint = ImportCheckpoint('import_items', options['source'])
+        try:
+            self.import_data(
+                checkpoint.read(resume=options['resume']),
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                rejects_path=options['rejects'],
+                update=options['update'],
+                checkpoint=checkpoint,
+            )
+        except SourceError as ex:
+            print(ex)
         else:
-            print('An error has occurred')
+            checkpoint.finish()
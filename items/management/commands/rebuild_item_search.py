@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from items.search import install_search_index, is_supported
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search index of items and its triggers'  # noqa: A003
+
+    def handle(self, *args, **options):
+        if not is_supported(connection):
+            raise CommandError(f'Full-text search of items requires SQLite, not {connection.vendor}')
+        install_search_index(connection)
+        print('The search index of items is rebuilt')
@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from items.images import generate_variants
+from items.models import Item
+from stepik_packages.importing.arguments import positive_int
+
+
+def regenerate(image_name, variants, force):
+    """Generate the variants of the image in a worker process and return the error or None."""
+    try:
+        generate_variants(image_name, variants, force)
+    except OSError as ex:
+        return str(ex)
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Generate the variants of the item images'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=positive_int,
+            help='Number of processes generating the variants, all the cores by default',
+            default=os.cpu_count())
+        parser.add_argument(
+            '--variant',
+            action='append',
+            choices=list(settings.ITEM_IMAGE_VARIANTS),
+            help='Variant to generate, all the variants by default, may be repeated')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Generate the existing variants again')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        image_names = list(Item.objects.exclude(image='').values_list('image', flat=True).distinct())
+        variants = options['variant'] or list(settings.ITEM_IMAGE_VARIANTS)
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            errors = executor.map(
+                regenerate,
+                image_names,
+                [variants] * len(image_names),
+                [options['force']] * len(image_names),
+                chunksize=8,
+            )
+            for image_name, error in zip(image_names, errors):
+                if error is not None:
+                    print(f'Image {image_name} is failed: {error}')
+                    failed += 1
+        elapsed = time.monotonic() - started
+        print(f'Images: {len(image_names)}, failed: {failed}, variants: {", ".join(variants)}')
+        print(f'Elapsed: {elapsed:.2f}s, {len(image_names) / elapsed if elapsed else 0:.1f} images/sec')
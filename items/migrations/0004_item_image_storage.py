@@ -0,0 +1,39 @@
+# Generated by Django 3.1.5 on 2026-10-17 18:25
+
+from django.db import migrations, models
+import items.storage
+from items.search import install_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0003_item_search_index'),
+    ]
+
+    # SQLite remakes items_item to alter the field and drops the triggers of the search index
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, install),
+        migrations.CreateModel(
+            name='ItemImageSource',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('etag', models.CharField(blank=True, max_length=200)),
+                ('last_modified', models.CharField(blank=True, max_length=50)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='image',
+            field=models.ImageField(storage=items.storage.ContentAddressedStorage(), upload_to='items'),
+        ),
+        migrations.RunPython(install, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,42 @@
 from django.conf import settings
 from django.db import models
+from django_cleanup import cleanup
 
+from .storage import item_image_storage
 
+
+# The image files are shared by the items with identical images, see items.storage
+@cleanup.ignore
 class Item(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
     image = models.ImageField(
         upload_to=settings.MEDIA_ITEMS_IMAGE_DIR,
+        storage=item_image_storage,
     )
     weight = models.IntegerField()
     price = models.DecimalField(decimal_places=2, max_digits=8)
 
+    class Meta:
+        indexes = [
+            # Price ranges and ordering by price with the id tie-breaker of the cursor pagination
+            models.Index(fields=['price', 'id'], name='items_item_price_id_idx'),
+            # Weight ranges, optionally combined with price ranges and ordering by price
+            models.Index(fields=['weight', 'price'], name='items_item_weight_price_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+
+class ItemImageSource(models.Model):
+    """Stored image of an import URL with the validators of its last response."""
+    url = models.URLField(max_length=500, unique=True)
+    name = models.CharField(max_length=200)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=50, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
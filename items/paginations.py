@@ -1,5 +1,89 @@
+from django.conf import settings
+from rest_framework.compat import coreapi, coreschema
 from rest_framework.pagination import PageNumberPagination
 
+from .filters import ItemSearchFilter
+from .search import is_ranked, SEARCH_RANK
+from stepik_packages.paginations import KeysetPagination
+
 
 class ItemPageNumberPagination(PageNumberPagination):
     page_size = 6
+
+
+class ItemCursorPagination(KeysetPagination):
+    page_size = 6
+
+    def get_ordering(self, request, queryset, view):
+        # The search results keep their relevance order unless ?ordering= is given
+        if is_ranked(queryset) and ItemSearchFilter.ordering_param not in request.query_params:
+            return (SEARCH_RANK, self.tie_breaker)
+        return super().get_ordering(request, queryset, view)
+
+
+class ItemPagination(ItemPageNumberPagination):
+    """
+    Page number pagination for the old clients and cursor pagination without
+    COUNT and OFFSET for the new ones. The mode is chosen by the `pagination`
+    query parameter (`page` or `cursor`), a request with a cursor is always
+    paginated by the cursor. ITEMS_DEFAULT_PAGINATION sets the default mode.
+    """
+
+    pagination_query_param = 'pagination'
+    cursor_pagination_class = ItemCursorPagination
+    cursor_paginator = None
+
+    def get_pagination_mode(self, request):
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            return 'cursor'
+        mode = request.query_params.get(self.pagination_query_param, settings.ITEMS_DEFAULT_PAGINATION)
+        return 'cursor' if mode == 'cursor' else 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_pagination_mode(request) == 'cursor':
+            self.cursor_paginator = self.cursor_pagination_class()
+            page = self.cursor_paginator.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor_paginator.display_page_controls
+            return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    def get_schema_fields(self, view):
+        pagination_field = coreapi.Field(
+            name=self.pagination_query_param,
+            required=False,
+            location='query',
+            schema=coreschema.Enum(
+                ['page', 'cursor'],
+                title='Pagination',
+                description='Pagination mode: page numbers or cursors.',
+            ),
+        )
+        return [
+            *super().get_schema_fields(view),
+            *self.cursor_pagination_class().get_schema_fields(view),
+            pagination_field,
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        pagination_parameter = {
+            'name': self.pagination_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Pagination mode: page numbers or cursors.',
+            'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+        }
+        return [
+            *super().get_schema_operation_parameters(view),
+            *self.cursor_pagination_class().get_schema_operation_parameters(view),
+            pagination_parameter,
+        ]
@@ -0,0 +1,116 @@
+"""
+Full-text search over the item title and description backed by an SQLite FTS5
+table. The table is an external content table over items_item kept in sync by
+triggers, so bulk inserts and raw SQL updates are indexed as well.
+
+SQLite rebuilds a table for most ALTERs of it and drops its triggers, so a
+migration which alters items.Item has to call `install_search_index` again.
+"""
+import re
+
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'items_item_fts'
+SEARCH_RANK = 'search_rank'
+# Weights of the title and description columns in the bm25 rank
+RANK_WEIGHTS = (10.0, 1.0)
+
+INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='items_item', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON items_item BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON items_item BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF id, title, description ON items_item BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+UNINSTALL_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(connection):
+    return connection.vendor == 'sqlite'
+
+
+def install_search_index(connection):
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+    rebuild_search_index(connection)
+
+
+def uninstall_search_index(connection):
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_search_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def build_match_query(term):
+    """
+    Turn user input into an FTS5 query: every word is quoted, so FTS5 syntax
+    in the input is matched literally, and matches as a prefix.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(term))
+
+
+def search_items(queryset, term, connection):
+    """
+    Filter the item queryset by the search term and annotate it with
+    `search_rank` (bm25, lower is better) on SQLite. Other databases fall back
+    to a case-insensitive substring match without a rank.
+    """
+    match_query = build_match_query(term)
+    if not match_query:
+        return queryset
+    if not is_supported(connection):
+        tokens = TOKEN_RE.findall(term)
+        for token in tokens:
+            queryset = queryset.filter(Q(title__icontains=token) | Q(description__icontains=token))
+        return queryset
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    # An annotation, not an extra select, so the cursor pagination can filter by the rank
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = items_item.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match_query],
+    ).annotate(**{SEARCH_RANK: RawSQL(f'bm25({FTS_TABLE}, {weights})', [], output_field=FloatField())})
+
+
+def is_ranked(queryset):
+    return SEARCH_RANK in queryset.query.annotations
@@ -1,9 +1,41 @@
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
 
+from .images import variant_url
 from .models import Item
 
 
+class ItemImageVariantsField(serializers.Field):
+    """
+    URLs of the image variants by their names. A variant which isn't generated
+    yet gets the URL of the endpoint which generates it and redirects to it.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant in settings.ITEM_IMAGE_VARIANTS:
+            url = variant_url(value.name, variant)
+            if url is None:
+                url = reverse('item-image-variant', kwargs={'pk': value.instance.pk, 'variant': variant})
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
 class ItemSerializer(serializers.ModelSerializer):
+    images = ItemImageVariantsField()
+
+    # Columns read by the serializer, for only() of the querysets of related items
+    model_fields = ['id', 'title', 'description', 'image', 'weight', 'price']
+
     class Meta:
         model = Item
-        fields = ['id', 'title', 'description', 'image', 'weight', 'price']
+        fields = ['id', 'title', 'description', 'image', 'images', 'weight', 'price']
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import catalog_cache
+from .images import generate_variants
+from .models import Item
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def bump_catalog_version(sender, **kwargs):
+    # A reader between the bump and the commit would cache the old rows under the new version
+    transaction.on_commit(catalog_cache.bump_version)
+
+
+@receiver(post_save, sender=Item)
+def generate_image_variants(sender, instance, update_fields=None, **kwargs):
+    if not instance.image or (update_fields is not None and 'image' not in update_fields):
+        return
+    try:
+        generate_variants(instance.image.name)
+    except OSError:
+        # A variant which failed here is generated on its first request
+        pass
@@ -0,0 +1,80 @@
+"""
+Content-addressed storage of the item images. A file is named by the sha256 of
+its bytes, so identical images are stored once and different images never
+collide by name. The files are shared between items, that's why django_cleanup
+ignores Item and `cleanup_item_images` removes the unreferenced ones.
+"""
+import hashlib
+import posixpath
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+IMAGE_TIMEOUT = 30
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content_hash = digest.hexdigest()
+        directory = posixpath.dirname(name) or settings.MEDIA_ITEMS_IMAGE_DIR
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, content_hash[:2], f'{content_hash}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+item_image_storage = ContentAddressedStorage()
+
+
+def content_hash_of(name):
+    """Return the content hash of a file name of the storage."""
+    return posixpath.splitext(posixpath.basename(name))[0]
+
+
+def conditional_headers(source, storage=item_image_storage):
+    """Return the headers of a conditional request of the image of a previous import."""
+    headers = {}
+    if source.name and storage.exists(source.name):
+        if source.etag:
+            headers['If-None-Match'] = source.etag
+        if source.last_modified:
+            headers['If-Modified-Since'] = source.last_modified
+    return headers
+
+
+def fetch_image(session, source, storage=item_image_storage):
+    """
+    Download the image of the ItemImageSource into the storage and return
+    whether it was downloaded, or None on failure. The source fields are
+    updated, not saved. A source of a previous import makes the request
+    conditional, so a not modified image isn't downloaded again.
+    """
+    headers = conditional_headers(source, storage)
+    try:
+        response = session.get(source.url, headers=headers, timeout=IMAGE_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if response.status_code == requests.codes.not_modified and headers:
+        return False
+    if not response:
+        return None
+    filename = posixpath.basename(urlparse(source.url).path)
+    source.name = storage.save(posixpath.join(settings.MEDIA_ITEMS_IMAGE_DIR, filename), ContentFile(response.content))
+    source.content_hash = content_hash_of(source.name)
+    source.etag = response.headers.get('ETag', '')
+    source.last_modified = response.headers.get('Last-Modified', '')
+    return True
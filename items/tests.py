@@ -0,0 +1,106 @@
+import json
+from base64 import b64encode
+from decimal import Decimal
+from urllib import parse
+
+from django.test import override_settings, TestCase
+from rest_framework.test import APIClient
+
+from carts.management.commands.check_query_budgets import ISOLATED_CACHES
+from items.cache import catalog_cache
+from items.models import Item
+
+PRICES = [Decimal(price) for price in ('10.00', '10.00', '5.50', '20.00', '10.00', '5.50', '7.25', '20.00',
+                                       '10.00', '1.00', '7.25', '10.00', '30.00', '10.00')]
+
+
+def encode_cursor(position=None, reverse=False):
+    """Encode a cursor like CursorPagination.encode_cursor, the position is sent as is."""
+    tokens = {}
+    if reverse:
+        tokens['r'] = '1'
+    if position is not None:
+        tokens['p'] = position if isinstance(position, str) else json.dumps(position)
+    return b64encode(parse.urlencode(tokens).encode()).decode()
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ItemCursorPaginationTests(TestCase):
+    """The keyset cursors walk the catalog forward and back without gaps and reject the tampered positions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = [
+            Item.objects.create(title=f'Item {number}', description='', image='items/cursor.jpg', weight=100,
+                                price=price)
+            for number, price in enumerate(PRICES)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        # The on_commit bumps don't run in a TestCase, the pages cached by the other tests are dropped here
+        catalog_cache.bump_version()
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, url, link):
+        """Return the ids of the pages following the `link` (next or previous) from the url."""
+        pages = []
+        while url:
+            page = self.get_page(url)
+            pages.append([item['id'] for item in page['results']])
+            url = page[link]
+        return pages
+
+    def assert_walks(self, query, expected_ids):
+        pages = self.walk(f'/api/v1/items/?pagination=cursor&{query}', 'next')
+        self.assertEqual([item_id for page in pages for item_id in page], expected_ids)
+        self.assertTrue(all(len(page) == 6 for page in pages[:-1]))
+        # Back from the last page through the previous links to the first one
+        last = self.get_page(f'/api/v1/items/?pagination=cursor&{query}')
+        while last['next']:
+            last = self.get_page(last['next'])
+        self.assertEqual(self.walk(last['previous'], 'previous'), pages[-2::-1])
+
+    def test_default_ordering(self):
+        self.assert_walks('', sorted(item.pk for item in self.items))
+
+    def test_ordering_with_equal_values(self):
+        by_price = sorted(self.items, key=lambda item: (item.price, item.pk))
+        self.assert_walks('ordering=price', [item.pk for item in by_price])
+        self.assert_walks('ordering=-price', [item.pk for item in reversed(by_price)])
+
+    def test_cursor_of_a_page_with_previous_items_added(self):
+        first = self.get_page('/api/v1/items/?pagination=cursor&ordering=price')
+        second = self.get_page(first['next'])
+        cheap = Item.objects.create(title='Cheapest', description='', image='items/cursor.jpg', weight=100,
+                                    price=Decimal('0.50'))
+        catalog_cache.bump_version()
+        # The page before the second one is still the first one, the new item is on the page before it
+        previous = self.get_page(second['previous'])
+        self.assertEqual(previous['results'], first['results'])
+        self.assertEqual([item['id'] for item in self.get_page(previous['previous'])['results']], [cheap.pk])
+
+    def test_tampered_cursors(self):
+        cursors = {
+            'not JSON': encode_cursor('not json'),
+            'not a list': encode_cursor({'price': '10.00'}),
+            'too short': encode_cursor(['10.00']),
+            'too long': encode_cursor(['10.00', '1', '2']),
+            'not strings': encode_cursor([None, 1]),
+            'not a price': encode_cursor(['cheap', '1']),
+            'not an id': encode_cursor(['10.00', 'first']),
+            'reversed, not a price': encode_cursor(['1e', '1'], reverse=True),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(name):
+                response = self.client.get('/api/v1/items/', {'ordering': 'price', 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_valid_forged_cursor(self):
+        response = self.client.get('/api/v1/items/', {'ordering': 'price', 'cursor': encode_cursor(['10.00', '0'])})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['price'], '10.00')
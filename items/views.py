@@ -1,19 +1,44 @@
+from django.conf import settings
+from django.http import HttpResponseRedirect
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import OrderingFilter
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.viewsets import GenericViewSet
 
-from .filters import ItemFilter
+from .cache import catalog_cache
+from .filters import ItemFilter, ItemSearchFilter
+from .images import generate_variant
 from .models import Item
-from .paginations import ItemPageNumberPagination
+from .paginations import ItemPagination
 from .serializers import ItemSerializer
+from .storage import item_image_storage
+from stepik_packages.caching import CachedResponseMixin
+from stepik_packages.replicas import ReplicaReadsMixin
 
 
-class ItemViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
+class ItemViewSet(ReplicaReadsMixin, CachedResponseMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet):
     queryset = Item.objects.get_queryset()
     serializer_class = ItemSerializer
-    pagination_class = ItemPageNumberPagination
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    pagination_class = ItemPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ItemSearchFilter]
     filterset_class = ItemFilter
     ordering = ['id']
     ordering_fields = ['price']
+    response_cache = catalog_cache
+
+    @action(detail=True, url_path=r'images/(?P<variant>\w+)', url_name='image-variant')
+    def image_variant(self, request, pk=None, variant=None):
+        """Redirect to the image variant, it's generated on the first request."""
+        if variant not in settings.ITEM_IMAGE_VARIANTS:
+            raise NotFound()
+        item = self.get_object()
+        if not item.image:
+            raise NotFound()
+        try:
+            name = generate_variant(item.image.name, variant)
+        except OSError:
+            # A missing, corrupt or non-image source, PIL.UnidentifiedImageError is an OSError
+            raise NotFound()
+        return HttpResponseRedirect(item_image_storage.url(name))
@@ -1,5 +1,24 @@
 from django.contrib import admin
 
 from .models import Review
+from .moderation import moderate_reviews
 
-admin.site.register(Review)
+
+def status_action(status):
+    def action(modeladmin, request, queryset):
+        result = moderate_reviews(queryset.values_list('pk', flat=True), status)
+        modeladmin.message_user(
+            request, f'Reviews moved to {status.label}: {result["moved"]}, skipped: {result["skipped"]}',
+        )
+
+    action.__name__ = f'make_{status.value}'
+    action.short_description = f'Move selected reviews to {status.label}'
+    return action
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ['id', 'author', 'status', 'created_at', 'published_at']
+    list_filter = ['status']
+    list_select_related = ['author']
+    actions = [status_action(status) for status in Review.StatusChoices]
@@ -0,0 +1,3 @@
+from stepik_packages.caching import VersionedResponseCache
+
+reviews_cache = VersionedResponseCache('reviews-feed', 'REVIEWS_FEED_CACHE')
@@ -1,20 +1,37 @@
-import json
+import time
+from collections import Counter
 from datetime import datetime
+from functools import lru_cache
 
-import requests
-import jsonschema
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.db.utils import IntegrityError
 from django.utils import timezone
 
-from reviews.models import Review
+from reviews.cache import reviews_cache
+from reviews.models import Review, shift_review_counts
+from stepik_packages.importing.arguments import positive_int
+from stepik_packages.importing.checkpoints import ImportCheckpoint
+from stepik_packages.importing.sources import batched, SourceError
+from stepik_packages.importing.updates import update_changed
+from stepik_packages.importing.validation import RecordValidator, RejectsFile
 from users.models import User
 
 URL_DEFAULT_REVIEWS = 'https://raw.githubusercontent.com/stepik-a-w/drf-project-boxes/master/reviews.json'
+DEFAULT_BATCH_SIZE = 1000
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value):
+    """Parse a date of the source, the dates repeat a lot so they are parsed once."""
+    if not value:
+        return None
+    return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
 
 
 class Command(BaseCommand):
-    BaseCommand.help = 'Import items from JSON data'
+    help = 'Import reviews from JSON data'  # noqa: A003
 
     json_review_schema = {
         "type": "object",
@@ -28,76 +45,170 @@ class Command(BaseCommand):
         },
         "required": ["id", "author", "content", "created_at", "published_at", "status"],
     }
+    validator = RecordValidator(json_review_schema)
+    verbosity = 1
 
     def add_arguments(self, parser):
         parser.add_argument(
             '-s',
             '--source',
             type=str,
-            help='Choice source url with JSON data',
+            help='Choice source url or path with JSON or JSONL data, gzip-compressed data is accepted',
             default=URL_DEFAULT_REVIEWS)
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=positive_int,
+            help='Number of reviews written in one transaction',
+            default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '-r',
+            '--rejects',
+            type=str,
+            help='Path of JSONL file for the rejected records with their errors',
+            default=None)
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the import of the source from its last committed batch')
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Update the existing reviews changed in the source instead of skipping them')
 
-    def validation_review(self, json_review):
-        result = True
-        try:
-            jsonschema.validate(json_review, schema=self.json_review_schema)
-        except jsonschema.exceptions.ValidationError as ex:
-            print(ex)
-            result = False
-        return result
-
-    def get_time_created_at(self, created_at):
-        return timezone.make_aware(datetime.strptime(created_at, '%Y-%m-%d'))
+    def build_review(self, json_review):
+        return Review(
+            pk=json_review['id'],
+            author_id=json_review['author'],
+            text=json_review['content'],
+            created_at=parse_date(json_review['created_at']) or timezone.now(),
+            published_at=parse_date(json_review['published_at']),
+            status=json_review['status'],
+        )
 
-    def get_time_published_at(self, published_at):
-        if published_at:
-            result = timezone.make_aware(datetime.strptime(published_at, '%Y-%m-%d'))
-        else:
-            result = None
-        return result
+    def log(self, message):
+        """Diagnostics of the failures counted by the report, shown with --verbosity 2."""
+        if self.verbosity >= 2:
+            self.stderr.write(message)
 
-    def create_review(self, json_review):
-        result = True
-        if User.objects.filter(pk=json_review['author']).exists():
+    def write_reviews(self, new_reviews, json_reviews, rejects):
+        try:
+            with transaction.atomic():
+                Review.objects.bulk_create(new_reviews)
+                # bulk_create sends no post_save, the counters are shifted in the same transaction
+                shift_review_counts(Counter((review.author_id, review.status) for review in new_reviews))
+            return len(new_reviews)
+        except (TypeError, ValueError, ValidationError, IntegrityError) as ex:
+            self.log(f'Batch of {len(new_reviews)} reviews is failed ({ex}). Creating them one by one')
+        created = 0
+        for new_review in new_reviews:
             try:
-                new_review = Review(
-                    pk=json_review['id'],
-                    author=User.objects.get(pk=json_review['author']),
-                    text=json_review['content'],
-                    created_at=self.get_time_created_at(json_review['created_at']),
-                    published_at=self.get_time_published_at(json_review['published_at']),
-                    status=json_review['status'],
+                with transaction.atomic():
+                    new_review.save(force_insert=True)
+                created += 1
+            except (TypeError, ValueError, ValidationError, IntegrityError) as ex:
+                rejects.write(
+                    json_reviews[new_review.pk], [{'path': '', 'message': f'Cannot create the review: {ex}'}],
                 )
-                new_review.save()
-            except (TypeError, IntegrityError) as ex:
-                print(ex)
-                result = False
-        else:
-            print(f"Author with id={json_review['author']} doesn't exist")
-            result = False
-        return result
-
-    def import_data(self, json_data):
-        for json_review in json_data:
-            if self.validation_review(json_review):
-                print(f"Review id={json_review['id']} will be created")
-                if Review.objects.filter(pk=json_review['id']):
-                    print('Review is exist. Created is cancelled')
-                elif self.create_review(json_review):
-                    print('Created is success')
-                else:
-                    print('Created is failed')
+        return created
+
+    def build_reviews(self, json_reviews, rejects, report):
+        reviews = []
+        for json_review in json_reviews:
+            try:
+                reviews.append(self.build_review(json_review))
+            except ValueError as ex:
+                rejects.write(json_review, [{'path': '', 'message': f'Invalid date: {ex}'}])
+                report['invalid'] += 1
+        return reviews
+
+    def import_batch(self, batch, rejects, report):
+        new_reviews = self.build_reviews(batch, rejects, report)
+        created = self.write_reviews(new_reviews, {json_review['id']: json_review for json_review in batch}, rejects)
+        report['created'] += created
+        report['failed'] += len(new_reviews) - created
+
+    def update_batch(self, batch, rejects, report):
+        reviews = self.build_reviews(batch, rejects, report)
+        with transaction.atomic():
+            old_counts = Review.objects.filter(pk__in=[review.pk for review in reviews]).count_deltas()
+            changed = update_changed(Review, reviews, ['text', 'created_at', 'published_at', 'status'])
+            if changed:
+                new_counts = Review.objects.filter(pk__in=[review.pk for review in reviews]).count_deltas()
+                new_counts.subtract(old_counts)
+                shift_review_counts(new_counts)
+        report['updated'] += len(changed)
+        report['exist'] += len(reviews) - len(changed)
+
+    def select_reviews(self, json_reviews, existing_ids, author_ids, rejects, report, update=False):
+        """Return the new reviews and, in the update mode, the existing ones."""
+        new_reviews, existing_reviews = [], []
+        for json_review in json_reviews:
+            is_existing = json_review['id'] in existing_ids
+            if is_existing and not update:
+                report['exist'] += 1
+            elif json_review['author'] not in author_ids:
+                rejects.write(json_review, [{
+                    'path': 'author',
+                    'message': f"Author with id={json_review['author']} doesn't exist",
+                }])
+                report['no_author'] += 1
+            elif is_existing:
+                existing_reviews.append(json_review)
             else:
-                print("JSON data of item isn't validation. Skipping creation")
+                existing_ids.add(json_review['id'])
+                new_reviews.append(json_review)
+        return new_reviews, existing_reviews
+
+    def import_data(self, records, batch_size=DEFAULT_BATCH_SIZE, rejects_path=None, update=False, checkpoint=None):
+        started = time.monotonic()
+        resumed = checkpoint is not None and checkpoint.offset > 0
+        report = dict.fromkeys(['total', 'invalid', 'exist', 'no_author', 'created', 'updated', 'failed'], 0)
+        existing_ids = set(Review.objects.values_list('pk', flat=True))
+        author_ids = set(User.objects.values_list('pk', flat=True))
+        with RejectsFile(rejects_path, append=resumed) as rejects:
+            for source_batch in batched(records, batch_size):
+                report['total'] += len(source_batch)
+                json_reviews, rejected = self.validator.split(source_batch)
+                rejects.write_many(rejected)
+                report['invalid'] += len(rejected)
+                new_reviews, existing_reviews = self.select_reviews(
+                    json_reviews, existing_ids, author_ids, rejects, report, update,
+                )
+                if existing_reviews:
+                    self.update_batch(existing_reviews, rejects, report)
+                if new_reviews:
+                    self.import_batch(new_reviews, rejects, report)
+                if checkpoint is not None:
+                    checkpoint.commit(len(source_batch))
+        if report['created'] or report['updated']:
+            reviews_cache.bump_version()
+        self.print_report(report, time.monotonic() - started, rejects_path)
+
+    def print_report(self, report, elapsed, rejects_path=None):
+        print(f"Reviews in source: {report['total']}")
+        print(f"Created: {report['created']}")
+        print(f"Updated: {report['updated']}")
+        print(f"Skipped as existing: {report['exist']}")
+        print(f"Skipped as invalid: {report['invalid']}")
+        print(f"Skipped without author: {report['no_author']}")
+        print(f"Failed: {report['failed']}")
+        print(f'Elapsed: {elapsed:.2f}s')
+        if rejects_path and report['invalid'] + report['no_author'] + report['failed']:
+            print(f'Rejected records are written to {rejects_path}')
 
     def handle(self, *args, **options):
-        response = requests.get(options['source'])
-        if response:
-            try:
-                json_data = response.json()
-            except json.decoder.JSONDecodeError:
-                print("The received data isn't JSON data")
-                return
-            self.import_data(json_data)
+        self.verbosity = options['verbosity']
+        checkpoint = ImportCheckpoint('import_reviews', options['source'])
+        try:
+            self.import_data(
+                checkpoint.read(resume=options['resume']),
+                batch_size=options['batch_size'],
+                rejects_path=options['rejects'],
+                update=options['update'],
+                checkpoint=checkpoint,
+            )
+        except SourceError as ex:
+            print(ex)
         else:
-            print('An error has occurred')
+            checkpoint.finish()
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from reviews.models import AuthorReviewCount, Review, ReviewStatusCount
+
+BATCH_SIZE = 1000
+
+
+def count_reviews(fields):
+    rows = Review.objects.order_by().values(*fields).annotate(reviews=Count('pk'))
+    return {tuple(row[field] for field in fields): row['reviews'] for row in rows}
+
+
+class Command(BaseCommand):
+    help = 'Check the review counters per author and per status against the reviews and repair them'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the drifted counters')
+
+    def rebuild(self, model, fields, dry_run=False):
+        """Repair the counters of the model keyed by `fields` and return the number of the drifted ones."""
+        actual = count_reviews(fields)
+        changed, orphans = [], []
+        for counter in model.objects.all():
+            key = tuple(getattr(counter, field) for field in fields)
+            count = actual.pop(key, 0)
+            if counter.count != count:
+                print(f'{model.__name__} {key}: stored {counter.count}, actual {count}')
+                counter.count = count
+                (changed if count else orphans).append(counter)
+        missing = []
+        for key, count in actual.items():
+            print(f'{model.__name__} {key}: missing, actual {count}')
+            missing.append(model(**dict(zip(fields, key)), count=count))
+        if not dry_run:
+            with transaction.atomic():
+                model.objects.filter(pk__in=[counter.pk for counter in orphans]).delete()
+                model.objects.bulk_update(changed, ['count'], batch_size=BATCH_SIZE)
+                model.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+        return len(changed) + len(orphans) + len(missing)
+
+    def handle(self, *args, **options):
+        drifted = self.rebuild(AuthorReviewCount, ['author_id', 'status'], options['dry_run'])
+        drifted += self.rebuild(ReviewStatusCount, ['status'], options['dry_run'])
+        print(f'Drifted counters: {drifted}')
+        if drifted and not options['dry_run']:
+            print('The counters are repaired')
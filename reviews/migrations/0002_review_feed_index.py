@@ -0,0 +1,17 @@
+# Generated by Django 3.1.5 on 2026-10-17 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['status', 'published_at', 'id'], name='reviews_status_published_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.1.5 on 2026-10-17 18:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def count_reviews(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ReviewStatusCount = apps.get_model('reviews', 'ReviewStatusCount')
+    AuthorReviewCount = apps.get_model('reviews', 'AuthorReviewCount')
+    rows = Review.objects.order_by().values('author', 'status').annotate(reviews=Count('pk'))
+    AuthorReviewCount.objects.bulk_create(
+        [AuthorReviewCount(author_id=row['author'], status=row['status'], count=row['reviews']) for row in rows],
+        batch_size=1000,
+    )
+    rows = Review.objects.order_by().values('status').annotate(reviews=Count('pk'))
+    ReviewStatusCount.objects.bulk_create(
+        [ReviewStatusCount(status=row['status'], count=row['reviews']) for row in rows],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0003_review_queue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewStatusCount',
+            fields=[
+                ('status', models.CharField(choices=[('published', 'Published'), ('new', 'New'), ('hidden', 'Hidden')], max_length=9, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuthorReviewCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('published', 'Published'), ('new', 'New'), ('hidden', 'Hidden')], max_length=9)),
+                ('count', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='authorreviewcount',
+            constraint=models.UniqueConstraint(fields=('author', 'status'), name='unique_author_review_status'),
+        ),
+        migrations.RunPython(count_reviews, migrations.RunPython.noop),
+    ]
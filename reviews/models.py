@@ -1,8 +1,42 @@
+from collections import Counter, defaultdict
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Now
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class ReviewQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(status=Review.StatusChoices.PUBLISHED, published_at__isnull=False)
+
+    def set_status(self, status):
+        """
+        Move the reviews to the status with one UPDATE and return the number of
+        the moved ones. Publishing sets published_at to the time of the database.
+        """
+        fields = {'status': status}
+        if status == Review.StatusChoices.PUBLISHED:
+            fields['published_at'] = Now()
+        moved = self.exclude(status=status).order_by()
+        with transaction.atomic():
+            deltas = Counter()
+            for row in moved.values('author', 'status').annotate(reviews=Count('pk')):
+                deltas[row['author'], row['status']] -= row['reviews']
+                deltas[row['author'], status] += row['reviews']
+            shift_review_counts(deltas)
+            return moved.update(**fields)
+
+    def count_deltas(self):
+        """Return the counter deltas {(author_id, status): count} of the reviews of the queryset."""
+        return Counter(
+            {(row['author'], row['status']): row['reviews'] for row in
+             self.order_by().values('author', 'status').annotate(reviews=Count('pk'))},
+        )
+
+
 class Review(models.Model):
     class StatusChoices(models.TextChoices):
         PUBLISHED = 'published', _('Published')
@@ -11,7 +45,8 @@ class Review(models.Model):
 
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     text = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default, not auto_now_add, so the imported reviews keep the dates of the source
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     published_at = models.DateTimeField(blank=True, null=True, default=None)
     status = models.CharField(
         max_length=9,
@@ -19,5 +54,94 @@ class Review(models.Model):
         default=StatusChoices.NEW,
     )
 
+    objects = ReviewQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The feed of the published reviews ordered by published_at with the id tie-breaker of the cursor
+            models.Index(fields=['status', 'published_at', 'id'], name='reviews_status_published_idx'),
+            # The moderation queue of a status ordered by created_at with the id tie-breaker of the cursor
+            models.Index(fields=['status', 'created_at', 'id'], name='reviews_status_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded()
+        return instance
+
+    def remember_loaded(self):
+        # The author and the status as saved, so saving a review knows which feed and counters it leaves
+        self.loaded_author_id = self.__dict__.get('author_id')
+        self.loaded_status = self.__dict__.get('status')
+
+    def remember_stored(self):
+        """
+        Remember the author and the status of the review as stored in the
+        database. The no-op UPDATE takes the write lock first, so a concurrent
+        save of the same review waits for the commit instead of leaving the same
+        status as this one.
+        """
+        stored = Review.objects.filter(pk=self.pk) if self.pk is not None else Review.objects.none()
+        row = stored.update(status=F('status')) and stored.values_list('author_id', 'status').first()
+        self.loaded_author_id, self.loaded_status = row or (None, None)
+
+    def save(self, *args, **kwargs):
+        # The counters are updated by post_save in the transaction of the review
+        with transaction.atomic():
+            self.remember_stored()
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f'Review of {self.author}'
+
+
+class ReviewStatusCount(models.Model):
+    status = models.CharField(max_length=9, choices=Review.StatusChoices.choices, primary_key=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.count} {self.status} reviews'
+
+
+class AuthorReviewCount(models.Model):
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='review_counts')
+    status = models.CharField(max_length=9, choices=Review.StatusChoices.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'status'], name='unique_author_review_status'),
+        ]
+
+    def __str__(self):
+        return f'{self.count} {self.status} reviews of user {self.author_id}'
+
+
+def shift_review_counts(deltas):
+    """
+    Shift the per-author and per-status counters by the deltas
+    {(author_id, status): delta} with a few set-based statements: the missing
+    counters are inserted, then one UPDATE per distinct (status, delta) pair.
+    Call it in the transaction which changes the reviews.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # A negative delta of a missing counter is of an author being deleted with the counters
+    AuthorReviewCount.objects.bulk_create(
+        [AuthorReviewCount(author_id=author_id, status=status) for (author_id, status), delta in deltas.items()
+         if delta > 0],
+        ignore_conflicts=True,
+    )
+    author_ids = defaultdict(list)
+    status_deltas = Counter()
+    for (author_id, status), delta in deltas.items():
+        author_ids[status, delta].append(author_id)
+        status_deltas[status] += delta
+    for (status, delta), ids in author_ids.items():
+        AuthorReviewCount.objects.filter(status=status, author__in=ids).update(count=F('count') + delta)
+    for status, delta in status_deltas.items():
+        if delta and not ReviewStatusCount.objects.filter(status=status).update(count=F('count') + delta):
+            ReviewStatusCount.objects.get_or_create(status=status)
+            ReviewStatusCount.objects.filter(status=status).update(count=F('count') + delta)
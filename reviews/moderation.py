@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import transaction
+
+from .cache import reviews_cache
+from .models import Review
+
+
+def moderate_reviews(review_ids, status, batch_size=None):
+    """
+    Move the reviews to the status by batches of REVIEWS_MODERATION_BATCH_SIZE
+    ids, every batch is one UPDATE in its own short transaction. Return the
+    numbers of the moved reviews and of the skipped ones, which are missing or
+    have the status already.
+    """
+    batch_size = batch_size or settings.REVIEWS_MODERATION_BATCH_SIZE
+    review_ids = list(dict.fromkeys(review_ids))
+    moved = 0
+    for start in range(0, len(review_ids), batch_size):
+        with transaction.atomic():
+            moved += Review.objects.filter(pk__in=review_ids[start:start + batch_size]).set_status(status)
+    if moved:
+        # The moved reviews are published or may have been published
+        reviews_cache.bump_version()
+    return {'moved': moved, 'skipped': len(review_ids) - moved}
@@ -0,0 +1,11 @@
+from stepik_packages.paginations import KeysetPagination
+
+
+class ReviewCursorPagination(KeysetPagination):
+    page_size = 6
+    ordering = ['-published_at']
+
+
+class ReviewQueuePagination(KeysetPagination):
+    page_size = 50
+    ordering = ['created_at']
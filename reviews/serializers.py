@@ -0,0 +1,46 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import Review
+from users.models import User
+
+
+class ReviewAuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'first_name', 'last_name']
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    author = ReviewAuthorSerializer(read_only=True)
+
+    # Fields loaded for the serializer, the rest of the review and the author is deferred
+    model_fields = ['id', 'text', 'published_at', 'author__id', 'author__first_name', 'author__last_name']
+
+    class Meta:
+        model = Review
+        fields = ['id', 'author', 'text', 'published_at']
+
+
+class ReviewModerationSerializer(serializers.ModelSerializer):
+    author = ReviewAuthorSerializer(read_only=True)
+
+    model_fields = [*ReviewSerializer.model_fields, 'status', 'created_at']
+
+    class Meta:
+        model = Review
+        fields = ['id', 'author', 'text', 'status', 'created_at', 'published_at']
+
+
+class ReviewStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.REVIEWS_MODERATION_MAX_IDS,
+    )
+    status = serializers.ChoiceField(choices=Review.StatusChoices.choices)
+
+
+class ReviewCountsSerializer(serializers.Serializer):
+    author = serializers.IntegerField(required=False)
+    statuses = serializers.DictField(child=serializers.IntegerField(), help_text='Number of the reviews per status')
@@ -0,0 +1,55 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import reviews_cache
+from .models import Review, shift_review_counts
+from .serializers import ReviewAuthorSerializer
+
+# Fields of the author shown by the feed
+AUTHOR_FIELDS = [field for field in ReviewAuthorSerializer.Meta.fields if field != 'id']
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    loaded_status = None if created else getattr(instance, 'loaded_status', None)
+    loaded = (getattr(instance, 'loaded_author_id', None), loaded_status)
+    current = (instance.author_id, instance.status)
+    if loaded != current:
+        deltas = Counter({current: 1})
+        if loaded_status is not None:
+            deltas[loaded] -= 1
+        shift_review_counts(deltas)
+    # Only a review which is or was published changes the feed
+    if Review.StatusChoices.PUBLISHED in (instance.status, loaded_status):
+        # A reader between the bump and the commit would cache the old feed under the new version
+        transaction.on_commit(reviews_cache.bump_version)
+    instance.remember_loaded()
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # Collector.delete() sends post_delete in the transaction of the delete
+    author_id = getattr(instance, 'loaded_author_id', None) or instance.author_id
+    status = getattr(instance, 'loaded_status', None) or instance.status
+    shift_review_counts({(author_id, status): -1})
+    if status == Review.StatusChoices.PUBLISHED:
+        transaction.on_commit(reviews_cache.bump_version)
+
+
+@receiver(pre_save, sender=get_user_model())
+def author_saving(sender, instance, update_fields=None, **kwargs):
+    fields = AUTHOR_FIELDS if update_fields is None else [field for field in AUTHOR_FIELDS if field in update_fields]
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first() if instance.pk and fields else None
+    instance.author_renamed = stored is not None and any(stored[field] != getattr(instance, field) for field in fields)
+
+
+@receiver(post_save, sender=get_user_model())
+def author_saved(sender, instance, **kwargs):
+    if getattr(instance, 'author_renamed', False):
+        # The feed shows the names of the authors
+        transaction.on_commit(reviews_cache.bump_version)
+        instance.author_renamed = False
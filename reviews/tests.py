@@ -0,0 +1,137 @@
+import io
+from contextlib import redirect_stdout
+from datetime import timedelta
+
+from django.test import override_settings, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from carts.management.commands.check_query_budgets import ISOLATED_CACHES
+from reviews.cache import reviews_cache
+from reviews.management.commands.import_reviews import Command as ImportReviewsCommand
+from reviews.management.commands.rebuild_review_counts import count_reviews
+from reviews.models import AuthorReviewCount, Review, ReviewStatusCount
+from users.models import User
+
+PUBLISHED, NEW, HIDDEN = Review.StatusChoices.PUBLISHED, Review.StatusChoices.NEW, Review.StatusChoices.HIDDEN
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ReviewCountsTests(TestCase):
+    """The counters maintained with the reviews match the counts of the reviews after every kind of change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create(username=f'author{number}', email=f'author{number}@example.com',
+                                phone=f'+7999000000{number}')
+            for number in range(2)
+        ]
+
+    def create_review(self, author=0, status=NEW):
+        review = Review(author=self.authors[author], text='Review', status=status)
+        review.save()
+        return review
+
+    def assert_counts(self):
+        author_counts = {
+            (counter.author_id, counter.status): counter.count for counter in AuthorReviewCount.objects.exclude(count=0)
+        }
+        self.assertEqual(author_counts, count_reviews(['author', 'status']))
+        status_counts = {counter.status: counter.count for counter in ReviewStatusCount.objects.exclude(count=0)}
+        self.assertEqual(status_counts, {status: count for (status,), count in count_reviews(['status']).items()})
+
+    def test_save(self):
+        review = self.create_review()
+        self.create_review(author=1, status=PUBLISHED)
+        self.assert_counts()
+        review.status = PUBLISHED
+        review.save()
+        self.assert_counts()
+        review.author = self.authors[1]
+        review.save()
+        self.assert_counts()
+        review.text = 'Changed text'
+        review.save()
+        self.assert_counts()
+
+    def test_save_of_stale_instance(self):
+        review = self.create_review()
+        stale = Review.objects.get(pk=review.pk)
+        review.status = PUBLISHED
+        review.save()
+        # The instance still has the loaded status, the counters are shifted from the stored one
+        stale.status = HIDDEN
+        stale.save()
+        self.assert_counts()
+        self.assertEqual(count_reviews(['status']), {(HIDDEN,): 1})
+
+    def test_set_status(self):
+        for author, status in [(0, NEW), (0, NEW), (1, NEW), (1, PUBLISHED), (0, HIDDEN)]:
+            self.create_review(author, status)
+        self.assertEqual(Review.objects.set_status(PUBLISHED), 4)
+        self.assert_counts()
+        self.assertEqual(Review.objects.filter(author=self.authors[1]).set_status(HIDDEN), 2)
+        self.assert_counts()
+
+    def test_delete(self):
+        review = self.create_review(status=PUBLISHED)
+        self.create_review(author=1)
+        self.create_review(author=1, status=HIDDEN)
+        review.delete()
+        self.assert_counts()
+        Review.objects.filter(author=self.authors[1]).delete()
+        self.assert_counts()
+        self.assertEqual(count_reviews(['status']), {})
+
+    def test_import(self):
+        records = [
+            {'id': 101, 'author': self.authors[0].pk, 'content': 'Review', 'created_at': '2020-09-08',
+             'published_at': '', 'status': NEW},
+            {'id': 102, 'author': self.authors[1].pk, 'content': 'Review', 'created_at': '2020-09-08',
+             'published_at': '2020-09-09', 'status': PUBLISHED},
+        ]
+        with redirect_stdout(io.StringIO()):
+            ImportReviewsCommand().import_data(records)
+        self.assert_counts()
+        records[0].update(status=PUBLISHED, published_at='2020-09-10')
+        records[1].update(status=HIDDEN)
+        with redirect_stdout(io.StringIO()):
+            ImportReviewsCommand().import_data(records, update=True)
+        self.assert_counts()
+        self.assertEqual(count_reviews(['status']), {(PUBLISHED,): 1, (HIDDEN,): 1})
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ReviewFeedPaginationTests(TestCase):
+    """The feed cursors neither lose nor repeat the reviews published at the same time."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='feed_author', email='feed_author@example.com', phone='+79990000009')
+        now = timezone.now()
+        # Groups of four reviews published at the same time, so the pages of six break inside the groups
+        Review.objects.bulk_create(
+            Review(author=author, text=f'Review {number}', status=PUBLISHED, published_at=now - timedelta(number // 4))
+            for number in range(15)
+        )
+        cls.expected = list(Review.objects.order_by('-published_at', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        # The on_commit bumps don't run in a TestCase, the pages cached by the other tests are dropped here
+        reviews_cache.bump_version()
+
+    def test_forward_and_back(self):
+        pages, url = [], '/api/v1/reviews/'
+        while url:
+            page = self.client.get(url).data
+            pages.append([review['id'] for review in page['results']])
+            url = page['next']
+        self.assertEqual([review_id for page in pages for review_id in page], self.expected)
+        url, back = page['previous'], []
+        while url:
+            page = self.client.get(url).data
+            back.append([review['id'] for review in page['results']])
+            url = page['previous']
+        self.assertEqual(back, pages[-2::-1])
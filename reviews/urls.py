@@ -0,0 +1,13 @@
+from rest_framework.routers import DefaultRouter
+
+from .views import ReviewCountsViewSet, ReviewModerationViewSet, ReviewViewSet
+
+router = DefaultRouter()
+# Before the feed, whose detail route would match "moderation" and "counts" as ids
+router.register('moderation', ReviewModerationViewSet, basename='review-moderation')
+router.register('counts', ReviewCountsViewSet, basename='review-counts')
+router.register('', ReviewViewSet, basename='review')
+
+urlpatterns = []
+
+urlpatterns += router.urls
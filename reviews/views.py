@@ -0,0 +1,77 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.exceptions import ValidationError
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from .cache import reviews_cache
+from .models import AuthorReviewCount, Review, ReviewStatusCount
+from .moderation import moderate_reviews
+from .paginations import ReviewCursorPagination, ReviewQueuePagination
+from .serializers import ReviewCountsSerializer, ReviewModerationSerializer, ReviewSerializer, ReviewStatusSerializer
+from stepik_packages.caching import CachedResponseMixin
+from stepik_packages.replicas import ReplicaReadsMixin
+
+
+class ReviewViewSet(ReplicaReadsMixin, CachedResponseMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet):
+    """The feed of the published reviews, newest first, and a published review by id."""
+
+    queryset = Review.objects.published().select_related('author').only(*ReviewSerializer.model_fields)
+    serializer_class = ReviewSerializer
+    pagination_class = ReviewCursorPagination
+    response_cache = reviews_cache
+
+
+class ReviewModerationViewSet(ListModelMixin, GenericViewSet):
+    """
+    The moderation queue of the reviews of a status (`new` by default), oldest
+    first, and the bulk status change of the reviews by their ids.
+    """
+
+    queryset = Review.objects.select_related('author').only(*ReviewModerationSerializer.model_fields)
+    serializer_class = ReviewModerationSerializer
+    pagination_class = ReviewQueuePagination
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        status = self.request.query_params.get('status', Review.StatusChoices.NEW)
+        if status not in Review.StatusChoices.values:
+            raise ValidationError({'status': [f'"{status}" is not a valid choice.']})
+        return super().get_queryset().filter(status=status)
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return ReviewStatusSerializer
+        return super().get_serializer_class()
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(moderate_reviews(serializer.validated_data['ids'], serializer.validated_data['status']))
+
+
+class ReviewCountsViewSet(GenericViewSet):
+    """
+    Numbers of the reviews per status of all the authors and of one author
+    from the counters maintained with the reviews, without counting them.
+    """
+
+    queryset = AuthorReviewCount.objects.all()
+    serializer_class = ReviewCountsSerializer
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def statuses(counters):
+        return {**dict.fromkeys(Review.StatusChoices.values, 0), **dict(counters.values_list('status', 'count'))}
+
+    # The counts of all the authors are one object, not a list
+    @swagger_auto_schema(responses={200: ReviewCountsSerializer})
+    def list(self, request):  # noqa: A003
+        return Response(self.get_serializer({'statuses': self.statuses(ReviewStatusCount.objects.all())}).data)
+
+    def retrieve(self, request, pk=None):
+        if not pk.isdigit():
+            raise ValidationError({'author': ['A valid integer is required.']})
+        counts = {'author': int(pk), 'statuses': self.statuses(self.get_queryset().filter(author=pk))}
+        return Response(self.get_serializer(counts).data)
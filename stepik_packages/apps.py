@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class StepikPackagesConfig(AppConfig):
+    name = 'stepik_packages'
+
+    def ready(self):
+        from . import database  # noqa: F401
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .replicas import get_read_snapshot_time
+
+RESPONSE_CACHE_DEFAULTS = {
+    'CACHE': 'default',
+    'TIMEOUT': 600,
+}
+
+
+class VersionedResponseCache:
+    """
+    Cache of serialized responses behind a version number. Bumping the version
+    invalidates all the entries at once: they are never read again and are
+    evicted by the cache backend.
+    """
+
+    def __init__(self, namespace, settings_name):
+        self.namespace = namespace
+        self.settings_name = settings_name
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def options(self):
+        return {**RESPONSE_CACHE_DEFAULTS, **getattr(settings, self.settings_name, {})}
+
+    @property
+    def cache(self):
+        return caches[self.options['CACHE']]
+
+    @property
+    def version_key(self):
+        return f'{self.namespace}:version'
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # Start from the current time, so a lost version never meets its old entries
+            self.cache.add(self.version_key, int(time.time() * 1000), None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    @property
+    def bumped_at_key(self):
+        return f'{self.namespace}:bumped-at'
+
+    def get_bumped_at(self):
+        """Time of the last bump of the version, a lost one starts from now."""
+        bumped_at = self.cache.get(self.bumped_at_key)
+        if bumped_at is None:
+            self.cache.add(self.bumped_at_key, time.time(), None)
+            bumped_at = self.cache.get(self.bumped_at_key)
+        return bumped_at
+
+    def bump_version(self):
+        self.cache.set(self.bumped_at_key, time.time(), None)
+        try:
+            return self.cache.incr(self.version_key)
+        except ValueError:
+            self.get_version()
+            return self.cache.incr(self.version_key)
+
+    def make_key(self, request, action, **kwargs):
+        params = sorted(request.query_params.lists())
+        params.extend(sorted(kwargs.items()))
+        digest = hashlib.sha256(
+            f'{request.build_absolute_uri("/")}?{urlencode(params, doseq=True)}'.encode(),
+        ).hexdigest()
+        return f'{self.namespace}:{self.get_version()}:{action}:{digest}'
+
+    def load(self, key):
+        data = self.cache.get(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def store(self, key, data):
+        self.cache.set(key, data, self.options['TIMEOUT'])
+
+
+class CachedResponseMixin:
+    """
+    Serve the `cached_actions` of a viewset from `response_cache`.
+    The key is built from the action, the URL kwargs and the query parameters.
+    """
+
+    response_cache = None
+    cached_actions = ('list', 'retrieve')
+
+    def dispatch_cached(self, handler, request, *args, **kwargs):
+        if self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+        key = self.response_cache.make_key(request, self.action, **kwargs)
+        data = self.response_cache.load(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and self.is_fresh_response():
+            self.response_cache.store(key, response.data)
+        return response
+
+    def is_fresh_response(self):
+        """
+        A response read from a replica snapshot older than the last bump may
+        miss the change of the bump, caching it under the new version would
+        serve it even to the client pinned to the primary.
+        """
+        snapshot_time = get_read_snapshot_time()
+        return snapshot_time is None or snapshot_time >= self.response_cache.get_bumped_at()
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return self.dispatch_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.dispatch_cached(super().retrieve, request, *args, **kwargs)
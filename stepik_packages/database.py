@@ -0,0 +1,30 @@
+"""
+Initialization of the database connections. Every new SQLite connection gets
+the SQLITE_PRAGMAS of the settings: busy_timeout makes a writer wait for the
+lock instead of failing with "database is locked", the cache and mmap sizes
+keep the hot pages in memory.
+
+The journal mode is stored in the database file, so it is not set by every
+connection: the set_journal_mode command switches a deployed database to WAL
+once, which lets the readers run alongside the writer.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS', getattr(settings, 'SQLITE_PRAGMAS', {}))
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def set_journal_mode(connection, mode):
+    """Switch the SQLite database of the connection to the journal mode and return the resulting mode."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode = {mode}')
+        return cursor.fetchone()[0]
@@ -0,0 +1,9 @@
+import argparse
+
+
+def positive_int(value):
+    """Argument type of the sizes and the numbers of workers of the commands."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive number')
+    return number
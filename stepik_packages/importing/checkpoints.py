@@ -0,0 +1,92 @@
+"""
+Checkpoints of the import commands. After every committed batch the number of
+the processed source records is saved together with the fingerprint of the
+source, so a failed import is resumed from the first uncommitted record unless
+the source has changed since.
+"""
+import hashlib
+import json
+import os
+from itertools import islice
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+from .sources import HTTP_TIMEOUT, read_records, source_path
+
+
+def source_fingerprint(source):
+    """
+    Return a fingerprint of the source without reading it: the size and the
+    modification time of a file, the validators of an http(s) response.
+    """
+    path = source_path(source)
+    if path is not None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        parts = [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+    else:
+        try:
+            response = requests.head(source, allow_redirects=True, timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            return None
+        headers = response.headers
+        parts = [source, headers.get('ETag'), headers.get('Last-Modified'), headers.get('Content-Length')]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class ImportCheckpoint:
+    def __init__(self, name, source, directory=None):
+        self.name = name
+        self.source = source
+        self.directory = Path(directory or settings.IMPORT_CHECKPOINT_DIR)
+        self.fingerprint = source_fingerprint(source)
+        self.offset = 0
+
+    @property
+    def path(self):
+        digest = hashlib.sha256(self.source.encode()).hexdigest()[:16]
+        return self.directory / f'{self.name}-{digest}.json'
+
+    def load(self):
+        """Return the offset of the saved checkpoint of the source or 0."""
+        try:
+            with open(self.path) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return 0
+        if self.fingerprint is None or state.get('fingerprint') != self.fingerprint:
+            print('The source has changed since the checkpoint, starting from the beginning')
+            return 0
+        return state.get('offset', 0)
+
+    def start(self, resume=False):
+        """Return the number of the source records to skip."""
+        self.offset = self.load() if resume else 0
+        if self.offset:
+            print(f'Resuming after {self.offset} records of the source')
+        return self.offset
+
+    def read(self, resume=False):
+        """Return the iterator of the source records after the checkpoint when resuming."""
+        return islice(read_records(self.source), self.start(resume), None)
+
+    def commit(self, count):
+        """Save the checkpoint after `count` more source records are committed."""
+        self.offset += count
+        self.directory.mkdir(parents=True, exist_ok=True)
+        state = {'source': self.source, 'fingerprint': self.fingerprint, 'offset': self.offset}
+        temporary_path = self.path.with_suffix('.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(temporary_path, self.path)
+
+    def finish(self):
+        """Remove the checkpoint of the completed import."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,184 @@
+"""
+Sources of the import commands. A source is an http(s) URL, a file:// URL or a
+local path with a JSON array of records or newline-delimited JSON (JSONL),
+optionally gzip-compressed. Records are parsed incrementally, so the memory
+doesn't depend on the size of the source.
+"""
+import gzip
+import io
+import json
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain, islice
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+# Characters of a single record, a longer one is a malformed source and isn't buffered further
+MAX_VALUE_SIZE = 16 * 2 ** 20
+GZIP_MAGIC = b'\x1f\x8b'
+HTTP_TIMEOUT = 60
+WHITESPACE = ' \t\r\n'
+NUMBER_CHARACTERS = '0123456789.eE+-'
+
+
+class SourceError(Exception):
+    pass
+
+
+class ResponseStream(io.RawIOBase):
+    """Readable binary stream over the body of a streamed response, Content-Encoding is decoded."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+        self.chunks = response.iter_content(CHUNK_SIZE)
+        self.rest = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.rest:
+            self.rest = next(self.chunks, b'')
+        size = min(len(buffer), len(self.rest))
+        buffer[:size] = self.rest[:size]
+        self.rest = self.rest[size:]
+        return size
+
+    def close(self):
+        self.response.close()
+        super().close()
+
+
+def source_path(source):
+    """Return the local path of the source or None for an http(s) source."""
+    parsed = urlparse(source)
+    if parsed.scheme in ('http', 'https'):
+        return None
+    if parsed.scheme == 'file':
+        return url2pathname(unquote(parsed.path))
+    return source
+
+
+@contextmanager
+def open_source(source):
+    """Open the source as a binary stream, gzip input is decompressed on the fly."""
+    path = source_path(source)
+    try:
+        if path is None:
+            response = requests.get(source, stream=True, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            raw = io.BufferedReader(ResponseStream(response), CHUNK_SIZE)
+        else:
+            raw = open(path, 'rb')
+    except (OSError, requests.RequestException) as ex:
+        raise SourceError(f'Cannot open the source {source}: {ex}') from ex
+    with raw:
+        if raw.peek(len(GZIP_MAGIC)).startswith(GZIP_MAGIC):
+            with gzip.GzipFile(fileobj=raw) as stream:
+                yield stream
+        else:
+            yield raw
+
+
+def _skip_whitespace(text, buffer, position):
+    """Return the buffer and the position of the next significant character, reading the stream if needed."""
+    while True:
+        while position < len(buffer) and buffer[position] in WHITESPACE:
+            position += 1
+        if position < len(buffer):
+            return buffer, position
+        buffer, position = text.read(CHUNK_SIZE), 0
+        if not buffer:
+            raise SourceError("The received data isn't JSON data: unexpected end of the array")
+
+
+def _is_cut(value, buffer, end):
+    """Whether the decoded value is a number which may continue in the stream, like `0` of a read ending in `0.`."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not buffer[end:].strip(NUMBER_CHARACTERS)
+
+
+def _decode_value(text, buffer, position, decoder):
+    """Decode the value at the position, reading the stream while the value may continue in it."""
+    while True:
+        error = None
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+            if end < len(buffer) and not _is_cut(value, buffer, end):
+                return value, buffer, end
+        except json.JSONDecodeError as ex:
+            error = ex
+        if len(buffer) - position > MAX_VALUE_SIZE:
+            raise SourceError(f"The received data isn't JSON data: an element is malformed or longer than "
+                              f'{MAX_VALUE_SIZE} characters') from error
+        # The reads grow with the buffer, so a long value isn't decoded over and over
+        chunk = text.read(max(CHUNK_SIZE, len(buffer) - position))
+        if not chunk:
+            if error is not None:
+                raise SourceError(f"The received data isn't JSON data: {error}") from error
+            return value, buffer, end
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def iter_json_array(text, buffer, decoder=json.JSONDecoder()):
+    """Yield the elements of the JSON array one by one, `buffer` is the read head of the text stream."""
+    buffer, position = _skip_whitespace(text, buffer, 1)
+    if buffer[position] == ']':
+        return
+    while True:
+        value, buffer, position = _decode_value(text, buffer, position, decoder)
+        yield value
+        buffer, position = _skip_whitespace(text, buffer, position)
+        if buffer[position] == ']':
+            return
+        if buffer[position] != ',':
+            raise SourceError(f"The received data isn't JSON data: unexpected {buffer[position]!r} in the array")
+        buffer, position = _skip_whitespace(text, buffer, position + 1)
+
+
+def read_lines(text, head):
+    """Yield the lines of the text stream which starts with `head`, a line is read up to MAX_VALUE_SIZE."""
+    read_line = partial(text.readline, MAX_VALUE_SIZE + 1)
+    for line in chain(io.StringIO(head + read_line()), iter(read_line, '')):
+        if len(line.rstrip('\n')) > MAX_VALUE_SIZE:
+            raise SourceError(f"The received data isn't JSON data: a line is longer than {MAX_VALUE_SIZE} characters")
+        yield line
+
+
+def iter_json_lines(lines):
+    """Yield the records of newline-delimited JSON, blank lines are skipped."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as ex:
+            raise SourceError(f"The received data isn't JSON data: line {number}: {ex}") from ex
+
+
+def read_records(source):
+    """Yield the records of the source, see the module docstring for the formats."""
+    with open_source(source) as stream:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+        head = ''
+        while not head:
+            chunk = text.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            head = chunk.lstrip(WHITESPACE)
+        if head.startswith('['):
+            yield from iter_json_array(text, head)
+        else:
+            yield from iter_json_lines(read_lines(text, head))
+
+
+def batched(records, size):
+    """Yield lists of up to `size` records."""
+    records = iter(records)
+    batch = list(islice(records, size))
+    while batch:
+        yield batch
+        batch = list(islice(records, size))
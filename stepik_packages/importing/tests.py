@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from stepik_packages.importing.sources import read_records, SourceError
+
+RECORDS = [
+    {'id': 1, 'title': 'Семейная коробка', 'price': 3000, 'weight': 9.2e3, 'tags': ['a', 'b'], 'image': None},
+    {'id': 12345678901234567890, 'title': 'with \\"escapes\\" and , ] inside', 'price': -1.5e-3},
+    {'id': 3, 'nested': {'deep': [[], {}, [1, [2, [3]]]]}, 'flag': True},
+    1234567,
+    'a string record',
+]
+CHUNK_SIZES = (1, 2, 3, 7, 64 * 1024)
+
+
+class ReadRecordsTests(SimpleTestCase):
+    """The incremental parser yields the records of json.loads whatever the chunk boundaries."""
+
+    def write_source(self, data, suffix='.json'):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'wb') as file:
+            file.write(data.encode() if isinstance(data, str) else data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def read(self, data, chunk_size=64 * 1024, max_value_size=None):
+        patches = {'CHUNK_SIZE': chunk_size}
+        if max_value_size is not None:
+            patches['MAX_VALUE_SIZE'] = max_value_size
+        with mock.patch.multiple('stepik_packages.importing.sources', **patches):
+            return list(read_records(self.write_source(data)))
+
+    def assert_records(self, data, expected):
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.read(data, chunk_size), expected)
+
+    def assert_malformed(self, data, max_value_size=None, message=''):
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size), self.assertRaisesMessage(SourceError, message):
+                self.read(data, chunk_size, max_value_size)
+
+    def test_array(self):
+        self.assert_records(json.dumps(RECORDS, ensure_ascii=False), RECORDS)
+        self.assert_records(json.dumps(RECORDS, indent=4), RECORDS)
+
+    def test_numbers_split_across_reads(self):
+        self.assert_records('[1234567890, 0.000125, -98765e-3, 42]', [1234567890, 0.000125, -98765e-3, 42])
+
+    def test_empty_array(self):
+        self.assert_records('[]', [])
+        self.assert_records(' \n [ \n ] \n', [])
+
+    def test_empty_source(self):
+        self.assert_records('', [])
+        self.assert_records(' \n\t ', [])
+
+    def test_truncated_array(self):
+        for data in ('[', '[1, 2', '[{"id": 1}', '[{"id": 1}, ', '[{"id": 1, "title": "unterminated'):
+            with self.subTest(data=data):
+                self.assert_malformed(data)
+
+    def test_malformed_array(self):
+        for data in ('[1 2]', '[1,, 2]', '[1, 2,]', '[{"id": 1} {"id": 2}]', '[{"id": }]', '[nope]'):
+            with self.subTest(data=data):
+                self.assert_malformed(data)
+
+    def test_json_lines(self):
+        data = ''.join(f'{json.dumps(record, ensure_ascii=False)}\n' for record in RECORDS)
+        self.assert_records(data, RECORDS)
+        self.assert_records(data.rstrip('\n'), RECORDS)
+
+    def test_json_lines_blank_lines(self):
+        self.assert_records('\n\n{"id": 1}\n\n  \n{"id": 2}\r\n\t\n', [{'id': 1}, {'id': 2}])
+
+    def test_malformed_json_lines(self):
+        with self.assertRaisesMessage(SourceError, 'line 2'):
+            self.read('{"id": 1}\n{"id": \n{"id": 3}\n')
+
+    def test_byte_order_mark(self):
+        self.assert_records('\ufeff[{"id": 1}]', [{'id': 1}])
+        self.assert_records('\ufeff{"id": 1}\n', [{'id': 1}])
+
+    def test_gzip(self):
+        data = gzip.compress(json.dumps(RECORDS).encode())
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.read(data, chunk_size), RECORDS)
+
+    def test_file_url(self):
+        path = self.write_source('[{"id": 1}]')
+        self.assertEqual(list(read_records(Path(path).as_uri())), [{'id': 1}])
+
+    def test_value_size_limit(self):
+        self.assertEqual(self.read('[{"id": 1}, "0123456789"]', 3, max_value_size=12), [{'id': 1}, '0123456789'])
+        self.assert_malformed('[{"id": 1}, "unterminated string of the source', 12, 'longer than 12 characters')
+        self.assert_malformed('{"id": 1}\n"0123456789ABCDEF"\n', 12, 'longer than 12 characters')
+
+    def test_missing_source(self):
+        with self.assertRaises(SourceError):
+            list(read_records('/nonexistent/source.json'))
@@ -0,0 +1,18 @@
+def update_changed(model, new_objects, fields):
+    """
+    Update the rows of the objects which differ from the database in `fields`
+    by one bulk_update and return the updated objects. The values are compared
+    after the field conversion, so 1500 and Decimal('1500.00') are equal.
+    """
+    model_fields = [model._meta.get_field(name) for name in fields]
+    current = model.objects.only(*fields).in_bulk([new_object.pk for new_object in new_objects])
+    changed = [
+        new_object for new_object in new_objects
+        if new_object.pk in current and any(
+            field.to_python(getattr(new_object, field.attname)) != getattr(current[new_object.pk], field.attname)
+            for field in model_fields
+        )
+    ]
+    if changed:
+        model.objects.bulk_update(changed, fields)
+    return changed
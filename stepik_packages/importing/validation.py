@@ -0,0 +1,130 @@
+"""
+Validation of the import records. The JSON schema of a command is compiled
+once: into a plain Python checker when the schema uses only `type`,
+`properties` and `required` (the schemas of the import commands do), and into
+a jsonschema validator which reports the errors of the rejected records.
+"""
+import json
+
+from jsonschema.validators import validator_for
+
+TYPE_CHECKS = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None,
+}
+FAST_KEYWORDS = {'type', 'properties', 'required'}
+
+
+def _compile_type(types):
+    if types is None:
+        return lambda value: True
+    types = [types] if isinstance(types, str) else types
+    if any(type_name not in TYPE_CHECKS for type_name in types):
+        return None
+    if len(types) == 1:
+        return TYPE_CHECKS[types[0]]
+    type_checks = [TYPE_CHECKS[type_name] for type_name in types]
+    return lambda value: any(type_check(value) for type_check in type_checks)
+
+
+def _make_checker(type_check, required, properties):
+    def check(value):
+        if not type_check(value):
+            return False
+        if not isinstance(value, dict):
+            return True
+        for name in required:
+            if name not in value:
+                return False
+        for name, checker in properties:
+            if name in value and not checker(value[name]):
+                return False
+        return True
+
+    return check
+
+
+def compile_checker(schema):
+    """
+    Return a function which is true for the values valid against the schema or
+    None if the schema uses keywords the checker doesn't support. A false result
+    isn't final: the value is validated by jsonschema then.
+    """
+    if not isinstance(schema, dict) or set(schema) - FAST_KEYWORDS:
+        return None
+    type_check = _compile_type(schema.get('type'))
+    properties = {name: compile_checker(subschema) for name, subschema in schema.get('properties', {}).items()}
+    if type_check is None or None in properties.values():
+        return None
+    return _make_checker(type_check, tuple(schema.get('required', [])), tuple(properties.items()))
+
+
+class RecordValidator:
+    def __init__(self, schema):
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+        self.validator = validator_class(schema)
+        self.fast_check = compile_checker(schema)
+
+    def errors(self, record):
+        """Return the list of errors of the record, empty for a valid record."""
+        if self.fast_check is not None and self.fast_check(record):
+            return []
+        return [
+            {'path': '/'.join(str(part) for part in error.absolute_path), 'message': error.message}
+            for error in self.validator.iter_errors(record)
+        ]
+
+    def split(self, records):
+        """Return the list of valid records and the list of (record, errors) of the invalid ones."""
+        valid, rejected = [], []
+        for record in records:
+            errors = self.errors(record)
+            if errors:
+                rejected.append((record, errors))
+            else:
+                valid.append(record)
+        return valid, rejected
+
+
+class RejectsFile:
+    """
+    JSONL file with the rejected records and their errors. Nothing is written
+    without a path, the rejects are only counted then. A resumed import appends
+    to the rejects of the interrupted one.
+    """
+
+    def __init__(self, path=None, append=False):
+        self.path = path
+        self.append = append
+        self.file = None
+        self.count = 0
+
+    def write(self, record, errors):
+        self.count += 1
+        if self.path is None:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'a' if self.append else 'w', encoding='utf-8')
+        record_id = record.get('id') if isinstance(record, dict) else None
+        self.file.write(json.dumps({'id': record_id, 'errors': errors, 'record': record}, ensure_ascii=False) + '\n')
+
+    def write_many(self, rejected):
+        for record, errors in rejected:
+            self.write(record, errors)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
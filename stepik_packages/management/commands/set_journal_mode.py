@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from stepik_packages.database import set_journal_mode
+
+JOURNAL_MODES = ['wal', 'delete', 'truncate', 'persist']
+
+
+class Command(BaseCommand):
+    help = 'Switch the SQLite database to the journal mode, the mode is stored in the database file'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'mode',
+            choices=JOURNAL_MODES,
+            help='Journal mode, wal lets the readers run alongside the writer')
+        parser.add_argument(
+            '--database',
+            help='Alias of the database',
+            default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database {options['database']} is not SQLite")
+        mode = set_journal_mode(connection, options['mode'])
+        print(f"Journal mode of {options['database']}: {mode}")
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from stepik_packages.replicas import get_options, sync_replica
+
+
+class Command(BaseCommand):
+    help = 'Copy a snapshot of the default database to the SQLite replicas of DATABASE_REPLICAS'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-d',
+            '--database',
+            action='append',
+            help='Alias of the replica to sync, all the replicas by default',
+            default=None)
+        parser.add_argument(
+            '-i',
+            '--interval',
+            type=float,
+            help='Seconds between the syncs, syncs once by default',
+            default=0)
+
+    def sync(self, aliases):
+        started = time.monotonic()
+        changed = [alias for alias in aliases if sync_replica(alias)]
+        elapsed = time.monotonic() - started
+        print(f'Synced replicas: {len(aliases)}, changed: {len(changed)}, elapsed: {elapsed:.2f}s')
+
+    def handle(self, *args, **options):
+        aliases = options['database'] or get_options()['ALIASES']
+        while True:
+            self.sync(aliases)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
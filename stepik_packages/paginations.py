@@ -0,0 +1,122 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import _reverse_ordering, Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination which keeps the values of all the ordering fields in the
+    cursor and filters by them, so every page is an index range scan and costs
+    the same regardless of its depth.
+
+    The ordering always ends with `tie_breaker`, a unique field, so rows with
+    equal values of the other ordering fields keep a stable order.
+    """
+
+    tie_breaker = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        fields = [order.lstrip('-') for order in ordering]
+        if self.tie_breaker not in fields and 'pk' not in fields:
+            direction = '-' if ordering[-1].startswith('-') else ''
+            ordering += (f'{direction}{self.tie_breaker}',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.decode_position(self.cursor, queryset)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_page = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_following_page
+        else:
+            self.has_next = has_following_page
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def decode_position(self, cursor, queryset):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        if not all(isinstance(value, str) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            # A tampered value would fail in the query
+            return [
+                self.get_ordering_field(queryset, order.lstrip('-')).to_python(value)
+                for order, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_ordering_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == 'pk':
+            return queryset.model._meta.pk
+        return queryset.model._meta.get_field(name)
+
+    def get_position_filter(self, ordering, position):
+        """
+        Build `(f1, f2, ...) > (v1, v2, ...)` for the given ordering as
+        `f1 >= v1 AND (f1 > v1 OR (f2 >= v2 AND (f2 > v2 OR ...)))`,
+        so the first field bounds an index range scan.
+        """
+        position_filter = None
+        for order, value in reversed(list(zip(ordering, position))):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            after = Q(**{f'{field}__{lookup}': value})
+            if position_filter is not None:
+                after = Q(**{f'{field}__{lookup}e': value}) & (after | position_filter)
+            position_filter = after
+        return position_filter
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self.get_position(self.page[-1]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.get_position(self.page[0]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def get_position(self, instance):
+        values = []
+        for order in self.ordering:
+            field = order.lstrip('-')
+            value = instance[field] if isinstance(instance, dict) else getattr(instance, field)
+            values.append(str(value))
+        return json.dumps(values)
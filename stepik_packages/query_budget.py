@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def format_queries(captured_queries):
+    return '\n'.join(f'{number}. {query["sql"]}' for number, query in enumerate(captured_queries, start=1))
+
+
+@contextmanager
+def query_budget(limit, using=DEFAULT_DB_ALIAS, label='block'):
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > limit:
+        raise QueryBudgetExceeded(
+            f'{label} executed {len(context)} queries, budget is {limit}:\n'
+            f'{format_queries(context.captured_queries)}',
+        )
+
+
+def assert_flat_query_count(run, sizes, limit=None, prepare=None, using=DEFAULT_DB_ALIAS, label='block'):
+    """
+    Call `run(size)` for every size and check that the number of executed queries
+    doesn't depend on the size and fits into `limit`. `prepare(size)` is called before
+    every run and its queries aren't counted. Return the number of queries.
+    """
+    counts = {}
+    for size in sizes:
+        if prepare is not None:
+            prepare(size)
+        with CaptureQueriesContext(connections[using]) as context:
+            run(size)
+        counts[size] = context
+    numbers = {size: len(context) for size, context in counts.items()}
+    if len(set(numbers.values())) > 1:
+        largest = counts[max(sizes)]
+        raise QueryBudgetExceeded(
+            f'{label} query count grows with the number of rows {numbers}:\n'
+            f'{format_queries(largest.captured_queries)}',
+        )
+    count = numbers[sizes[0]]
+    if limit is not None and count > limit:
+        raise QueryBudgetExceeded(
+            f'{label} executed {count} queries, budget is {limit}:\n'
+            f'{format_queries(counts[sizes[0]].captured_queries)}',
+        )
+    return count
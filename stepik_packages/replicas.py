@@ -0,0 +1,195 @@
+"""
+Routing of the reads of the catalog and the reviews to the read replicas of
+DATABASE_REPLICAS, the writes and all the other reads go to the primary.
+
+Only the safe requests of the views with ReplicaReadsMixin, the read-only
+API endpoints, read from the replicas outside of the transactions of the
+primary. The other views, the admin among them, always read the primary, so
+a form never shows and saves back a stale snapshot. After a successful write
+the client (its token or session) is pinned to the primary for MAX_LAG
+seconds, so it reads its own writes.
+A replica lagging behind the primary by more than MAX_LAG seconds is not
+used, the reads fall back to the primary.
+
+The SQLite replicas are snapshots of the primary copied by the sync_replica
+command, their lag is the age of the oldest change missing from the snapshot.
+"""
+import hashlib
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_DEFAULTS = {
+    'ALIASES': [],
+    'APPS': [],
+    'MAX_LAG': 30,
+    'PIN_CACHE': 'default',
+}
+
+# Seconds the lag of the replicas is trusted by a process
+LAG_CHECK_INTERVAL = 1
+
+replica_reads = ContextVar('replica_reads', default=False)
+# Aliases of the replicas read by the current request, None outside of the requests
+read_replicas = ContextVar('read_replicas', default=None)
+_fresh_replicas = {'checked': 0.0, 'aliases': []}
+
+
+def get_options():
+    return {**REPLICA_DEFAULTS, **getattr(settings, 'DATABASE_REPLICAS', {})}
+
+
+def database_path(alias):
+    return Path(connections[alias].settings_dict['NAME'])
+
+
+def marker_path(alias):
+    path = database_path(alias)
+    return path.with_name(f'{path.name}.synced')
+
+
+def changed_at(alias):
+    """Time of the last write to the SQLite database, the WAL file changes on every commit."""
+    path = database_path(alias)
+    times = [candidate.stat().st_mtime for candidate in (path, path.with_name(f'{path.name}-wal'))
+             if candidate.exists()]
+    return max(times, default=0.0)
+
+
+def synced_at(alias):
+    """Start of the last snapshot of the primary in the replica or None if it was never synced."""
+    try:
+        return float(marker_path(alias).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def replica_lag(alias):
+    if connections[alias].vendor != 'sqlite':
+        # The lag of a streaming replica is watched by the database itself
+        return 0.0
+    started = synced_at(alias)
+    if started is None:
+        return float('inf')
+    if changed_at(DEFAULT_DB_ALIAS) <= started:
+        return 0.0
+    return time.time() - started
+
+
+def snapshot_time(alias):
+    """Time up to which the replica has all the commits of the primary."""
+    if connections[alias].vendor != 'sqlite':
+        return time.time()
+    return synced_at(alias) or 0.0
+
+
+def get_read_snapshot_time():
+    """Time of the oldest replica snapshot read by the current request or None when it read only the primary."""
+    aliases = read_replicas.get()
+    if not aliases:
+        return None
+    return min(snapshot_time(alias) for alias in aliases)
+
+
+def sync_replica(alias):
+    """Copy a consistent snapshot of the primary into the SQLite replica and return whether it was changed."""
+    started = time.time()
+    previous = synced_at(alias)
+    changed = previous is None or changed_at(DEFAULT_DB_ALIAS) > previous
+    source = connections[DEFAULT_DB_ALIAS]
+    source.ensure_connection()
+    # The backup writes the replica in one transaction, its readers see either the old or the new snapshot
+    target = sqlite3.connect(database_path(alias))
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+    marker_path(alias).write_text(str(started))
+    return changed
+
+
+def get_fresh_replicas():
+    now = time.monotonic()
+    if now - _fresh_replicas['checked'] >= LAG_CHECK_INTERVAL:
+        options = get_options()
+        _fresh_replicas['aliases'] = [
+            alias for alias in options['ALIASES'] if replica_lag(alias) <= options['MAX_LAG']
+        ]
+        _fresh_replicas['checked'] = now
+    return _fresh_replicas['aliases']
+
+
+def get_pin_key(request):
+    identity = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not identity:
+        return None
+    return f'replica-pin:{hashlib.sha256(identity.encode()).hexdigest()}'
+
+
+def is_pinned(request):
+    pin_key = get_pin_key(request)
+    return pin_key is not None and bool(caches[get_options()['PIN_CACHE']].get(pin_key))
+
+
+class ReplicaMiddleware:
+    """Scopes the replica reads to the request and pins the clients to the primary after their writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replica_reads.set(False)
+        read_token = read_replicas.set(set())
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+            read_replicas.reset(read_token)
+        pin_key = get_pin_key(request)
+        if pin_key and request.method not in SAFE_METHODS and response.status_code < 400:
+            options = get_options()
+            # A replica within MAX_LAG has all the writes older than MAX_LAG seconds
+            caches[options['PIN_CACHE']].set(pin_key, True, options['MAX_LAG'])
+        return response
+
+
+class ReplicaReadsMixin:
+    """Reads the safe requests of a read-only viewset from the replicas, unless the client is pinned."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request):
+            replica_reads.set(True)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_reads.get() or model._meta.app_label not in get_options()['APPS']:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # The uncommitted writes of the transaction are only seen on the primary
+            return DEFAULT_DB_ALIAS
+        replicas = get_fresh_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        alias = random.choice(replicas)
+        read_replicas.get().add(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replicas get the schema with the snapshots of the primary
+        return db == DEFAULT_DB_ALIAS
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,10 +46,11 @@ INSTALLED_APPS = [
     'django_cleanup.apps.CleanupConfig',
     'django_filters',
     'corsheaders',
-    'reviews',
-    'users',
-    'items',
-    'carts',
+    'reviews.apps.ReviewsConfig',
+    'users.apps.UsersConfig',
+    'items.apps.ItemsConfig',
+    'carts.apps.CartsConfig',
+    'stepik_packages.apps.StepikPackagesConfig',
 ]
 
 MIDDLEWARE = [
@@ -58,6 +60,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'stepik_packages.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,10 +87,21 @@ WSGI_APPLICATION = 'stepik_packages.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
 }
 
+# In-process LRU cache of token -> user used by CachedTokenAuthentication.
+# Set SHARED_CACHE to an alias of CACHES to share the entries between processes.
+# VERSION_CACHE is an alias of a cache shared between the processes, so an invalidation (logout, user change)
+# reaches the entries of all of them. Without it the other processes accept the token for up to TIMEOUT seconds.
+TOKEN_AUTHENTICATION_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 60,
+    'SHARED_CACHE': None,
+    'VERSION_CACHE': 'catalog',
+}
+
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
@@ -95,9 +109,96 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Connections are reused by the requests of a worker for 10 minutes
+        'CONN_MAX_AGE': 600,
+        # A file, not the shared in-memory database, so the concurrent connections of the tests wait for the locks
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # A snapshot of default copied by the sync_replica command
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'PRAGMAS': {
+            'query_only': 1,
+            'busy_timeout': 5000,
+            'cache_size': -64000,
+            'mmap_size': 256 * 2 ** 20,
+            'temp_store': 'memory',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
     },
 }
 
+DATABASE_ROUTERS = ['stepik_packages.replicas.ReplicaRouter']
+
+# The safe requests of the views with ReplicaReadsMixin read the models of APPS from the replicas lagging
+# by at most MAX_LAG seconds, a client is pinned to default for MAX_LAG seconds after its write.
+DATABASE_REPLICAS = {
+    'ALIASES': ['replica'],
+    'APPS': ['items', 'reviews'],
+    'MAX_LAG': 30,
+    'PIN_CACHE': 'catalog',
+}
+
+# Applied to every new SQLite connection by stepik_packages.database,
+# a database of DATABASES may override them by its own PRAGMAS. The journal mode is stored
+# in the database file and is not set here: `python manage.py set_journal_mode wal` sets it once.
+SQLITE_PRAGMAS = {
+    # Milliseconds a writer waits for the lock of another one
+    'busy_timeout': 5000,
+    # Safe with the WAL of set_journal_mode: a commit may be lost on a power failure, the database is never corrupted
+    'synchronous': 'normal',
+    # KiB of the page cache of a connection when negative
+    'cache_size': -64000,
+    'mmap_size': 256 * 2 ** 20,
+    'temp_store': 'memory',
+}
+
+# Caches
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared between the processes, so the import commands invalidate the catalog of the web server
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'catalog',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 3,
+        },
+    },
+}
+
+# Serialized list pages and items of the catalog, invalidated by the catalog version
+ITEMS_CATALOG_CACHE = {
+    'CACHE': 'catalog',
+    'TIMEOUT': 60 * 60,
+}
+
+# Serialized pages of the published reviews feed, invalidated when a published review changes
+REVIEWS_FEED_CACHE = {
+    'CACHE': 'catalog',
+    'TIMEOUT': 60 * 60,
+}
+
+# Bulk moderation of the reviews: ids of one request and ids moved by one UPDATE
+REVIEWS_MODERATION_MAX_IDS = 10000
+REVIEWS_MODERATION_BATCH_SIZE = 500
+
+# Checkpoints of the import commands, `--resume` continues an import from its last committed batch
+IMPORT_CHECKPOINT_DIR = BASE_DIR / '.cache' / 'import'
+
+# Pagination of the item catalog without the `pagination` query parameter: 'page' or 'cursor'
+ITEMS_DEFAULT_PAGINATION = 'page'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -143,6 +244,26 @@ MEDIA_URL = '/media/'
 
 MEDIA_ITEMS_IMAGE_DIR = 'items'
 
+MEDIA_ITEMS_VARIANTS_DIR = 'item-variants'
+
+# Variants of the item images: the box the image is fitted into (None keeps the size), the format and its quality
+ITEM_IMAGE_VARIANTS = {
+    'thumbnail': {'SIZE': (320, 320), 'FORMAT': 'JPEG', 'QUALITY': 80},
+    'thumbnail_webp': {'SIZE': (320, 320), 'FORMAT': 'WEBP', 'QUALITY': 80},
+    'webp': {'SIZE': None, 'FORMAT': 'WEBP', 'QUALITY': 85},
+}
+
 AUTH_USER_MODEL = 'users.User'
 
+# Keep Cart.total_cost/items_count stored and updated on every cart item change.
+# When disabled the cart totals are aggregated in SQL on each request.
+CARTS_STORE_TOTALS = True
+
+# Maximum number of operations of one request to /api/v1/carts/items/batch/
+CARTS_BATCH_MAX_OPERATIONS = 100
+
+# A read of the cart updates its last_activity not more often than this,
+# changes of the cart items always do. Carts are purged by `purge_carts`
+CARTS_ACTIVITY_RESOLUTION = timedelta(hours=1)
+
 APPEND_SLASH = True
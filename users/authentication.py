@@ -0,0 +1,205 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE_DEFAULTS = {
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 60,
+    'SHARED_CACHE': None,
+    'VERSION_CACHE': None,
+    'KEY_PREFIX': 'auth-token',
+}
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    """
+    Token authentication which joins the user's cart in, so `User.my_cart`
+    doesn't need its own query in the cart endpoints.
+    """
+
+    def authenticate_credentials(self, key):
+        try:
+            token = Token.objects.select_related('user__cart').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+class TokenUserCache:
+    """
+    Bounded LRU cache of token key -> user with a TTL, backed by an optional
+    shared Django cache. Users are stored as plain field values, so every hit
+    builds a fresh instance and the user's cart is attached with its data fields
+    deferred: they are loaded from the database only when they are read.
+
+    With a version cache shared between the processes every token has a
+    version there, which `invalidate` bumps. An entry stored under an older
+    version is a miss, so an invalidation reaches the entries of all the
+    processes. Without it the invalidation is local to the process and the
+    other ones keep the entry for up to `timeout` seconds.
+    """
+
+    def __init__(self, max_entries, timeout, shared_cache=None, key_prefix='auth-token', version_cache=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.shared_cache = caches[shared_cache] if shared_cache else None
+        self.version_cache = caches[version_cache] if version_cache else None
+        self.key_prefix = key_prefix
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, token_key):
+        return f'{self.key_prefix}:{hashlib.sha256(token_key.encode()).hexdigest()}'
+
+    def get_version(self, token_key):
+        """Return the current version of the token, read it before loading the user to cache."""
+        if self.version_cache is None:
+            return None
+        version_key = f'{self.make_key(token_key)}:version'
+        version = self.version_cache.get(version_key)
+        if version is None:
+            # Start from the current time, so a lost version never meets the old entries
+            self.version_cache.add(version_key, int(time.time() * 1000), None)
+            version = self.version_cache.get(version_key)
+        return version
+
+    def get_user(self, token_key):
+        key = self.make_key(token_key)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self.entries[key]
+                entry = None
+        shared = entry is None and self.shared_cache is not None
+        if shared:
+            entry = self.shared_cache.get(key)
+        if entry is not None and entry[2] != self.get_version(token_key):
+            # Invalidated by another process
+            entry = None
+        with self.lock:
+            if entry is None:
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            if shared:
+                self.shared_hits += 1
+                self.store_local(key, entry[1], entry[2])
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        return self.load_user(entry[1])
+
+    def set_user(self, token_key, user, version=None):
+        key = self.make_key(token_key)
+        payload = self.dump_user(user)
+        with self.lock:
+            self.store_local(key, payload, version)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, (None, payload, version), self.timeout)
+
+    def store_local(self, key, payload, version=None):
+        self.entries[key] = (time.monotonic() + self.timeout, payload, version)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token_key):
+        key = self.make_key(token_key)
+        with self.lock:
+            self.entries.pop(key, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(key)
+        if self.version_cache is not None:
+            self.get_version(token_key)
+            self.version_cache.incr(f'{key}:version')
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+            }
+
+    @staticmethod
+    def dump_user(user):
+        user_model = type(user)
+        attnames = [field.attname for field in user_model._meta.concrete_fields]
+        cart = user_model.cart.related.get_cached_value(user, default=None)
+        cart_pk = cart.pk if cart is not None else None
+        return pickle.dumps((user._state.db, attnames, [getattr(user, attname) for attname in attnames], cart_pk))
+
+    @staticmethod
+    def load_user(payload):
+        from carts.models import Cart
+        from users.models import User
+
+        db, attnames, values, cart_pk = pickle.loads(payload)
+        user = User.from_db(db, attnames, values)
+        if cart_pk is not None:
+            user.cart = Cart.from_db(db, ['id', 'user_id'], [cart_pk, user.pk])
+        return user
+
+
+@lru_cache(maxsize=None)
+def get_token_user_cache():
+    options = {**TOKEN_CACHE_DEFAULTS, **getattr(settings, 'TOKEN_AUTHENTICATION_CACHE', {})}
+    return TokenUserCache(
+        max_entries=options['MAX_ENTRIES'],
+        timeout=options['TIMEOUT'],
+        shared_cache=options['SHARED_CACHE'],
+        key_prefix=options['KEY_PREFIX'],
+        version_cache=options['VERSION_CACHE'],
+    )
+
+
+def invalidate_user_tokens(user):
+    cache = get_token_user_cache()
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        cache.invalidate(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    `TokenAuthentication` which caches token -> user for
+    `TOKEN_AUTHENTICATION_CACHE['TIMEOUT']` seconds, so repeated requests with
+    the same token don't query the database.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_user_cache()
+        user = cache.get_user(key)
+        if user is None:
+            version = cache.get_version(key)
+            user, token = super().authenticate_credentials(key)
+            cache.set_user(key, user, version)
+            return (user, token)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, Token(key=key, user=user))
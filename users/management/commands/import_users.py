@@ -1,17 +1,36 @@
-import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-import requests
-import jsonschema
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.db.utils import IntegrityError
+from phonenumber_field.phonenumber import to_python as to_phone_number
+from rest_framework.authtoken.models import Token
 
+from carts.models import Cart
+from stepik_packages.importing.arguments import positive_int
+from stepik_packages.importing.checkpoints import ImportCheckpoint
+from stepik_packages.importing.sources import batched, SourceError
+from stepik_packages.importing.updates import update_changed
+from stepik_packages.importing.validation import RecordValidator, RejectsFile
+from users.authentication import get_token_user_cache
 from users.models import User
 
 URL_DEFAULT_USERS = 'https://raw.githubusercontent.com/stepik-a-w/drf-project-boxes/master/recipients.json'
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PHONE_REGION = 'RU'
+
+
+def hash_password(password):
+    return make_password(password)
 
 
 class Command(BaseCommand):
-    BaseCommand.help = 'Import users from JSON data'
+    help = 'Import users from JSON data'  # noqa: A003
 
     json_user_schema = {
         "type": "object",
@@ -26,76 +45,213 @@ class Command(BaseCommand):
                     "name": {"type": "string"},
                     "patronymic": {"type": "string"},
                 },
+                "required": ["surname", "name", "patronymic"],
             },
             "contacts": {
                 "type": "object",
                 "properties": {
                     "phoneNumber": {"type": "string"},
                 },
+                "required": ["phoneNumber"],
             },
             "city_kladr": {"type": "string"},
         },
+        "required": ["id", "email", "password", "info", "contacts", "city_kladr"],
     }
+    validator = RecordValidator(json_user_schema)
+    verbosity = 1
 
     def add_arguments(self, parser):
         parser.add_argument(
             '-s',
             '--source',
             type=str,
-            help='Choice source url with JSON data',
+            help='Choice source url or path with JSON or JSONL data, gzip-compressed data is accepted',
             default=URL_DEFAULT_USERS)
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=positive_int,
+            help='Number of processes hashing the passwords, all the cores by default',
+            default=os.cpu_count())
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=positive_int,
+            help='Number of users written in one transaction',
+            default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--phone-region',
+            type=str,
+            help='Region of the phone numbers written without the country code',
+            default=DEFAULT_PHONE_REGION)
+        parser.add_argument(
+            '-r',
+            '--rejects',
+            type=str,
+            help='Path of JSONL file for the rejected records with their errors',
+            default=None)
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the import of the source from its last committed batch')
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Update the existing users changed in the source instead of skipping them, passwords are kept')
 
-    def validation_user(self, json_user):
-        result = True
-        try:
-            jsonschema.validate(json_user, schema=self.json_user_schema)
-        except jsonschema.exceptions.ValidationError as ex:
-            print(ex)
-            result = False
-        return result
+    def validation_phone(self, json_user, phone_region, rejects):
+        phone = to_phone_number(json_user['contacts']['phoneNumber'], region=phone_region)
+        if not phone or not phone.is_valid():
+            rejects.write(json_user, [{
+                'path': 'contacts/phoneNumber',
+                'message': f"{json_user['contacts']['phoneNumber']!r} is not a valid phone number",
+            }])
+            return None
+        return phone
+
+    def build_user(self, json_user, phone, password):
+        return User(
+            pk=json_user['id'],
+            username=json_user['email'].split('@')[0],
+            email=json_user['email'],
+            password=password,
+            first_name=json_user['info']['name'],
+            last_name=json_user['info']['surname'],
+            middle_name=json_user['info']['patronymic'],
+            phone=phone,
+            address=json_user['city_kladr'],
+        )
 
-    def create_user(self, json_user):
-        result = True
-        username = json_user['email'].split('@')[0]
+    def log(self, message):
+        """Diagnostics of the failures counted by the report, shown with --verbosity 2."""
+        if self.verbosity >= 2:
+            self.stderr.write(message)
+
+    def write_users(self, new_users, json_users, rejects):
         try:
-            new_user = User(
-                pk=json_user['id'],
-                username=username,
-                email=json_user['email'],
-                first_name=json_user['info']['name'],
-                last_name=json_user['info']['surname'],
-                middle_name=json_user['info']['patronymic'],
-                phone=json_user['contacts']['phoneNumber'],
-                address=json_user['city_kladr'],
-            )
-            new_user.set_password(json_user['password'])
-            new_user.save()
-        except (TypeError, IntegrityError) as ex:
-            print(ex)
-            result = False
-        return result
-
-    def import_data(self, json_data):
-        for json_user in json_data:
-            if self.validation_user(json_user):
-                print(f"User id={json_user['id']} will be created")
-                if User.objects.filter(pk=json_user['id']).exists():
-                    print('User is exist. Created is cancelled')
-                elif self.create_user(json_user):
-                    print('Created is success')
-                else:
-                    print('Created is failed')
+            with transaction.atomic():
+                User.objects.bulk_create(new_users)
+                Cart.objects.bulk_create(Cart(user_id=new_user.pk) for new_user in new_users)
+            return len(new_users)
+        except (TypeError, ValueError, ValidationError, IntegrityError) as ex:
+            self.log(f'Batch of {len(new_users)} users is failed ({ex}). Creating them one by one')
+        created = 0
+        for new_user in new_users:
+            try:
+                with transaction.atomic():
+                    new_user.save(force_insert=True)
+                    Cart.objects.create(user=new_user)
+                created += 1
+            except (TypeError, ValueError, ValidationError, IntegrityError) as ex:
+                rejects.write(json_users[new_user.pk], [{'path': '', 'message': f'Cannot create the user: {ex}'}])
+        return created
+
+    def import_batch(self, executor, batch, rejects, report):
+        passwords = executor.map(hash_password, [json_user['password'] for json_user, _ in batch], chunksize=16)
+        new_users = [
+            self.build_user(json_user, phone, password)
+            for (json_user, phone), password in zip(batch, passwords)
+        ]
+        created = self.write_users(new_users, {json_user['id']: json_user for json_user, _ in batch}, rejects)
+        report['created'] += created
+        report['failed'] += len(new_users) - created
+
+    def update_batch(self, batch, report):
+        changed = update_changed(
+            User,
+            [self.build_user(json_user, phone, None) for json_user, phone in batch],
+            ['email', 'first_name', 'last_name', 'middle_name', 'phone', 'address'],
+        )
+        if changed:
+            # The authentication cache holds the field values of the users
+            token_cache = get_token_user_cache()
+            for key in Token.objects.filter(user__in=changed).values_list('key', flat=True):
+                token_cache.invalidate(key)
+        report['updated'] += len(changed)
+        report['exist'] += len(batch) - len(changed)
+
+    def select_users(self, json_users, phone_region, existing, rejects, report, update=False):
+        """Return the new users and, in the update mode, the existing ones with their phone numbers."""
+        new_users, existing_users = [], []
+        for json_user in json_users:
+            username = json_user['email'].split('@')[0]
+            is_existing = json_user['id'] in existing['ids']
+            if (is_existing and not update) or (not is_existing and username in existing['usernames']):
+                report['exist'] += 1
+                continue
+            phone = self.validation_phone(json_user, phone_region, rejects)
+            if phone is None:
+                report['invalid_phone'] += 1
+            elif is_existing:
+                existing_users.append((json_user, phone))
             else:
-                print("JSON data of user isn't validation. Skipping creation")
+                existing['ids'].add(json_user['id'])
+                existing['usernames'].add(username)
+                new_users.append((json_user, phone))
+        return new_users, existing_users
+
+    def import_data(
+        self,
+        records,
+        workers=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        phone_region=DEFAULT_PHONE_REGION,
+        rejects_path=None,
+        update=False,
+        checkpoint=None,
+    ):
+        started = time.monotonic()
+        resumed = checkpoint is not None and checkpoint.offset > 0
+        report = dict.fromkeys(['total', 'invalid', 'exist', 'invalid_phone', 'created', 'updated', 'failed'], 0)
+        existing = {
+            'ids': set(User.objects.values_list('pk', flat=True)),
+            'usernames': set(User.objects.values_list('username', flat=True)),
+        }
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor, \
+                RejectsFile(rejects_path, append=resumed) as rejects:
+            for source_batch in batched(records, batch_size):
+                report['total'] += len(source_batch)
+                json_users, rejected = self.validator.split(source_batch)
+                rejects.write_many(rejected)
+                report['invalid'] += len(rejected)
+                new_users, existing_users = self.select_users(
+                    json_users, phone_region, existing, rejects, report, update,
+                )
+                if existing_users:
+                    self.update_batch(existing_users, report)
+                if new_users:
+                    self.import_batch(executor, new_users, rejects, report)
+                if checkpoint is not None:
+                    checkpoint.commit(len(source_batch))
+        self.print_report(report, time.monotonic() - started, rejects_path)
+
+    def print_report(self, report, elapsed, rejects_path=None):
+        print(f"Users in source: {report['total']}")
+        print(f"Created: {report['created']}")
+        print(f"Updated: {report['updated']}")
+        print(f"Skipped as existing: {report['exist']}")
+        print(f"Skipped as invalid: {report['invalid']}")
+        print(f"Skipped with invalid phone number: {report['invalid_phone']}")
+        print(f"Failed: {report['failed']}")
+        print(f"Elapsed: {elapsed:.2f}s, {report['created'] / elapsed if elapsed else 0:.1f} users/sec")
+        if rejects_path and report['invalid'] + report['invalid_phone'] + report['failed']:
+            print(f'Rejected records are written to {rejects_path}')
 
     def handle(self, *args, **options):
-        response = requests.get(options['source'])
-        if response:
-            try:
-                json_data = response.json()
-            except json.decoder.JSONDecodeError:
-                print("The received data isn't JSON data")
-                return
-            self.import_data(json_data)
+        self.verbosity = options['verbosity']
+        checkpoint = ImportCheckpoint('import_users', options['source'])
+        try:
+            self.import_data(
+                checkpoint.read(resume=options['resume']),
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                phone_region=options['phone_region'],
+                rejects_path=options['rejects'],
+                update=options['update'],
+                checkpoint=checkpoint,
+            )
+        except SourceError as ex:
+            print(ex)
         else:
-            print('An error has occurred')
+            checkpoint.finish()
@@ -15,5 +15,20 @@ class User(AbstractUser):
 
     @property
     def my_cart(self):
-        cart, _ = Cart.objects.get_or_create(user=self)
-        return cart
+        try:
+            return self.cart
+        except Cart.DoesNotExist:
+            self.cart, _ = Cart.objects.get_or_create(user=self)
+            return self.cart
+
+    def reset_cart(self):
+        """
+        Forget the cart of the user and return the current one. The token
+        authentication cache of another worker may hold the pk of a cart deleted
+        by purge_carts until its entry expires, so its entries are dropped too.
+        """
+        from users.authentication import invalidate_user_tokens
+
+        type(self).cart.related.delete_cached_value(self)
+        invalidate_user_tokens(self)
+        return self.my_cart
@@ -1,7 +1,9 @@
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
 from .models import User
+from carts.models import Cart
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -38,7 +40,9 @@ class UserSerializer(serializers.ModelSerializer):
             address=validated_data['address'],
         )
         user.set_password(validated_data['password'])
-        user.save()
+        with transaction.atomic():
+            user.save()
+            user.cart = Cart.objects.create(user=user)
         return user
 
     def update(self, instance, validated_data):
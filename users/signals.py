@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_user_cache, invalidate_user_tokens
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    get_token_user_cache().invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    # The login only sets last_login, every other save may change is_active, the password or the profile
+    if not created and set(update_fields or ()) != {'last_login'}:
+        invalidate_user_tokens(instance)